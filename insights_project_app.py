@@ -1,102 +1,110 @@
-import folium
-import numpy as np
+import os
 import pandas as pd
 import streamlit as st
-import plotly.express as px
-from datetime import datetime
-from folium.plugins  import MarkerCluster
-from streamlit_folium import folium_static
 from streamlit_option_menu import option_menu
+from modules.dataset import load_data, dataset_version
+from modules.recommendation import purchase_suggestions
+from modules.suggestion_index import SuggestionIndex
+from modules.hypotheses import HypothesisEngine, aggregate_cube
+from modules.cube import PriceCube, suggestion_statistics
+from modules.result_cache import ResultCache, result_key
+from modules import profiling
+from modules.profiling import stage
 
 st.set_page_config(layout = 'wide')
 
+#store mantido pelo CLI de ingestão (python -m modules.ingestion); quando definido, os dados vêm dele e não dos CSVs.
+STORE_PATH = os.environ.get('HOUSE_ROCKET_STORE')
+
 with st.sidebar:
     selected = option_menu('Menu', ['Introduction', 'Insights', 'Results'], icons=['house', 'lightbulb', 'bookmark-check'], menu_icon='cast', default_index=0)
 
 @st.cache(allow_output_mutation= True)
 
-def get_data(path1, path2):
-    data = pd.read_csv(path1)
-    data_address = pd.read_csv(path2)
-    data = pd.merge(data, data_address, on='id', how='inner').drop(columns=['query'],axis=1)
+def get_data(path1, path2, version):
+    #version só entra na chave do cache: arquivos com conteúdo novo geram uma nova entrada.
+    if STORE_PATH:
+        return get_store(version).data
+    data = load_data(path1, path2)
     return data
 
-def data_manipulation(data):
-
-    #apagando id's duplicados 
-    data.drop_duplicates(subset=['id'], inplace=True, keep='first') 
-
-    #convertendo a coluna date para o tipo datetime
-    data['date'] = pd.to_datetime(data['date'])
-
-    #definindo uma data e hora padrão para células contendo zero.
-    data['yr_renovated'] = data['yr_renovated'].apply(lambda x: pd.to_datetime(1900, format='%Y') if x == 0 else pd.to_datetime(x, format='%Y'))
-
-    #especificando quais propriedades foram reformadas.
-    data['renovated'] = data.apply(lambda line: 'no' if line['yr_renovated'] == pd.to_datetime(1900, format='%Y') else 'yes', axis=1)
+@st.cache(allow_output_mutation= True)
 
-    #convertendo a coluna yr_built em datetime.
-    data['yr_built'] = pd.to_datetime(data['yr_built'], format='%Y')
+def get_store(version):
 
-    #Excluindo a linha do imóvel contendo 33 quartos, considerado um erro de digitação.
-    data = data.drop(data[data['bedrooms'] == 33].index)
+    #o store é lido uma vez por versão gravada pelo CLI de ingestão
+    from modules.ingestion import SalesStore
+    return SalesStore.load(STORE_PATH)
 
-    #definindo quais propriedades têm um porão e quais não.
-    data['basement'] = data['sqft_basement'].apply(lambda line: 'without basement' if line == 0 else 'with basement')
+def data_version(path1, path2):
 
-    #criando uma coluna com ano.
-    data['year'] = data['date'].dt.year
+    #versão dos dados: a do store, quando configurado, ou a dos CSVs.
+    if STORE_PATH:
+        from modules.ingestion import store_version
+        return store_version(STORE_PATH)
+    return dataset_version(path1, path2)
 
-    #criando uma coluna com a estação do ano.
-    data['season'] = data['date'].apply(data_season)
+@st.cache(allow_output_mutation= True)
 
-    #detalhando quais casas têm vista para o mar e quais não.
-    data['waterfront'] = data['waterfront'].apply(lambda line: 'yes' if line == 1 else 'no')
+def get_result_cache():
 
-    #detalhando quais casas têm vista para o mar e quais não.
-    data['bathrooms'] = data['bathrooms'].apply(lambda line: round(line, 2))
-
-    return data
-
-def data_season(line):
-    
-    if line.month == 6 or line.month == 7 or line.month == 8:
-        return 'summer'
-    elif line.month == 9 or line.month == 10 or line.month == 11:
-        return 'autumn'
-    elif line.month == 12 or line.month == 1 or line.month == 2:
-        return 'winter'
-    else:
-        return 'spring'
+    #cache de resultados em disco, compartilhado por todas as sessões e processos do dashboard
+    return ResultCache()
 
 def suggested_map(data):
 
-    density_map = folium.Map(location=[data['lat'].mean(), data['long'].mean()],
-                             default_zoom_start=15)
-
-    marker_cluster = MarkerCluster().add_to(density_map)
-
-    for name, row in data.iterrows():
+    #folium só é importado quando o mapa da página Results é exibido.
+    from streamlit_folium import folium_static
+    from modules.map_rendering import density_map
 
-        folium.Marker([row['lat'],  row['long'] ], popup = 'id: {0}. price: U${1}'.format(row['id'], row['price'])).add_to(marker_cluster)
+    properties_map = density_map(data)
 
-    folium_static(density_map)
+    with stage('suggested_map.render'):
+        folium_static(properties_map)
 
     return None
 
-def view_financial_results_and_map(purchase_table): 
-        
-    number = len(purchase_table.index)
-    sp_sum = purchase_table['price'].sum()
-    profit_sum = purchase_table['profit'].sum()
-
-    results_table = {'Number of Properties': number, 'Total Investiment (U$)': sp_sum, 'Total Profit (U$)': profit_sum}
-
+def get_export(path1, path2, version, pricing, insight1, insight2, insight3, fmt):
+
+    #arquivo da tabela filtrada em disco, gravado uma vez por versão dos dados, filtros e formato
+    from modules.export import cached_export
+
+    key = result_key(['export', 'store' if STORE_PATH else 'csv', version, pricing, insight1, insight2, insight3])
+    with stage('results.export'):
+        return cached_export(key, lambda: filtered_suggestions(path1, path2, version, pricing, insight1, insight2, insight3)[0], fmt)
+
+def export_buttons(export_key, totals):
+
+    #exportando a tabela filtrada e os resultados financeiros para a equipe de aquisição.
+    from modules.export import MIME_TYPES, totals_csv, totals_json
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        fmt = st.selectbox('Export format', ['csv', 'parquet', 'geojson'])
+    export_key = export_key + (fmt,)
+    with col2:
+        #o arquivo só é montado quando pedido, e não a cada interação com a página.
+        if st.session_state.get('export') != export_key and st.button('Prepare export'):
+            st.session_state['export'] = export_key
+        if st.session_state.get('export') == export_key:
+            with open(get_export(*export_key), 'rb') as export_file:
+                st.download_button('Download suggested properties', export_file,
+                                   file_name='suggested_properties.{0}'.format(fmt), mime=MIME_TYPES[fmt])
+    with col3:
+        if fmt == 'csv':
+            st.download_button('Download financial results', totals_csv(totals), file_name='financial_results.csv', mime='text/csv')
+        else:
+            st.download_button('Download financial results', totals_json(totals), file_name='financial_results.json', mime='application/json')
+
+def view_financial_results_and_map(purchase_table, results_table, export_key): 
+
+    totals = results_table
     results_table = pd.DataFrame(results_table, index=[''])
 
     st.dataframe(purchase_table)
     st.title('Financial Result Table')
     st.dataframe(results_table)
+    export_buttons(export_key, totals)
 
     st.title('Map of suggested properties')
 
@@ -108,81 +116,85 @@ def view_financial_results_and_map(purchase_table):
 
 def introduction():
 
-    if selected == 'Introduction':
+    st.title('The House Hocket Project')
+    st.write('')
+    st.write('The House Rocket is a digital platform whose business model is the purchase and sale of real estate using technology.')
+    st.write('Their main strategy is to buy houses in good condition, with great locations, at low prices and then resell them at higher prices, thus increasing the company\'s profit and revenue.')
+    st.write('However, the business team has to deal with several variables that influence the price, making them more or less attractive to buyers and sellers; Also the amount of data is large, and it would take a lot of time to do the work manually.')
+    st.write('The purpose of this application is to help the CEO to decide which are the best homes to buy and what are the best prices and time of year to sell them; as well as display the profit made.')
 
-        st.title('The House Hocket Project')
-        st.write('')
-        st.write('The House Rocket is a digital platform whose business model is the purchase and sale of real estate using technology.')
-        st.write('Their main strategy is to buy houses in good condition, with great locations, at low prices and then resell them at higher prices, thus increasing the company\'s profit and revenue.')
-        st.write('However, the business team has to deal with several variables that influence the price, making them more or less attractive to buyers and sellers; Also the amount of data is large, and it would take a lot of time to do the work manually.')
-        st.write('The purpose of this application is to help the CEO to decide which are the best homes to buy and what are the best prices and time of year to sell them; as well as display the profit made.')
+    st.title('Assumptions')
 
-        st.title('Assumptions')
+    st.write(':black_medium_small_square: The line corresponding to a property with 33 bedrooms has been removed as it was considered a typo. ')
+    st.write(':black_medium_small_square: Properties with a renewal year equal to zero or yr_renovated column = 0 were considered without renovation. ')
+    st.write(':black_medium_small_square: Properties with basement area equal to zero or sqft_basement column = 0 were considered as without basement. ')
+    st.write(':black_medium_small_square: This is an initial project that will be improved as the author\'s skills evolve.')
 
-        st.write(':black_medium_small_square: The line corresponding to a property with 33 bedrooms has been removed as it was considered a typo. ')
-        st.write(':black_medium_small_square: Properties with a renewal year equal to zero or yr_renovated column = 0 were considered without renovation. ')
-        st.write(':black_medium_small_square: Properties with basement area equal to zero or sqft_basement column = 0 were considered as without basement. ')
-        st.write(':black_medium_small_square: This is an initial project that will be improved as the author\'s skills evolve.')
+    st.title('The Product')
 
-        st.title('The Product')
+    st.write('A table of suggestions that selects properties in excellent condition and prices lower than the average prices of their respective regions. 10 business hypotheses were evaluated to generate insights, presented in the "insights" tab. You can narrow down table suggestions from filters based on these insights. Furthermore, a competitive sale price for the market is suggested and capable of generating a considerable profit, in addition to the best season of the year to sell the property purchased. A map is also displayed to identify the location of properties suggested by the id, which changes along with the filters.')
+    st.write('')
+    st.write('It is also presented the profit and the total investment of the suggestions that varies according to the chosen filters. The maximum number of properties to be recommended is 3775, the maximum investment is U\$1,483,480,263 and the maximum profit earned is U\$315,284,211.')
 
-        st.write('A table of suggestions that selects properties in excellent condition and prices lower than the average prices of their respective regions. 10 business hypotheses were evaluated to generate insights, presented in the "insights" tab. You can narrow down table suggestions from filters based on these insights. Furthermore, a competitive sale price for the market is suggested and capable of generating a considerable profit, in addition to the best season of the year to sell the property purchased. A map is also displayed to identify the location of properties suggested by the id, which changes along with the filters.')
-        st.write('')
-        st.write('It is also presented the profit and the total investment of the suggestions that varies according to the chosen filters. The maximum number of properties to be recommended is 3775, the maximum investment is U\$1,483,480,263 and the maximum profit earned is U\$315,284,211.')
+@st.cache(allow_output_mutation= True)
 
-def insights(data):
+def get_cube(path1, path2, version):
 
-    if selected == 'Insights':
+    #cubo de estatísticas de preço, calculado uma vez por versão dos dados
+    return PriceCube(get_data(path1, path2, version))
 
-        st.title('Hypothesis')
+@st.cache(allow_output_mutation= True)
 
-        col1, col2 = st.columns(2)
+def get_hypotheses(path1, path2, version):
 
-        with col1:
+    #resultados das hipóteses, com agregados lidos do cubo (ou mantidos pelo store); calculados por um processo e lidos do cache pelos demais
+    if STORE_PATH:
+        return get_result_cache().cached(['hypotheses', 'store', version], lambda: get_store(version).hypotheses.results())
+    return get_result_cache().cached(['hypotheses', version],
+                                     lambda: HypothesisEngine(aggregates=aggregate_cube(get_cube(path1, path2, version))).results())
 
-            #Hipótese 1  
-            st.subheader('H1')
-            st.write('Properties that overlook the water are 30% more expensive, on average.')
-            st.caption(f'That\'s Incorrect. Waterfront properties are 212.60% more expensive.')
+def hypothesis(results, name):
 
-            water_front_median = data[['price', 'waterfront']].groupby('waterfront').mean().reset_index()
+    st.subheader(name)
+    st.write(results[name]['hypothesis'])
+    st.caption(results[name]['caption'])
 
-            graph = px.bar(water_front_median, x='waterfront', y='price', labels={
-                "waterfront": "Waterfront?", "price": "Average Price (U$)"
-            }
-                            )
+    return results[name]['table']
 
+def insights(results):
 
-            st.plotly_chart(graph, use_container_width=True)
+    #plotly só é importado quando a página Insights é exibida.
+    import plotly.express as px
 
-            # Hipótese 2 
-            st.subheader('H2')
-            st.write('Properties with a construction date less than 1955 are 50% cheaper, on average.')
-            st.caption(f'That\'s Incorrect. Properties with a construction date less than 1955 are 1.09% cheaper, on average.')
+    st.title('Hypothesis')
 
-            dt_before_1955 = data[data['yr_built'] < pd.to_datetime(1955, format='%Y')]['price'].mean()
-            dt_after_1955 = data[data['yr_built'] > pd.to_datetime(1955, format='%Y')]['price'].mean()
+    col1, col2 = st.columns(2)
 
-            column_0 = ['before 1955', 'after 1955']
-            column_1 = [dt_before_1955, dt_after_1955]
+    with col1:
 
-            h2 = {
-                'Construction Period': column_0,
-                'Price': column_1
+        #Hipótese 1  
+        with stage('insights.H1'):
+            water_front_median = hypothesis(results, 'H1')
+
+            graph = px.bar(water_front_median, x='waterfront', y='price', labels={
+                "waterfront": "Waterfront?", "price": "Average Price (U$)"
             }
+                            )
+
+
+            st.plotly_chart(graph, use_container_width=True)
 
-            yr_built_1955 = pd.DataFrame(h2, index=[0, 1])
+        # Hipótese 2 
+        with stage('insights.H2'):
+            yr_built_1955 = hypothesis(results, 'H2')
 
             graph = px.bar(yr_built_1955, x='Construction Period', y='Price')
 
             st.plotly_chart(graph, use_container_width=True)
 
-            #Hipótese 3 
-            st.subheader('H3')
-            st.write('Properties without a basement are 50% larger than those with a basement.')
-            st.caption('That\'s Incorrect. Properties without a basement are 19.82% smaller than those with a basement.')
-
-            basement = data[['basement', 'sqft_living']].groupby('basement').mean().reset_index()
+        #Hipótese 3 
+        with stage('insights.H3'):
+            basement = hypothesis(results, 'H3')
 
             graph = px.bar(basement, x='basement', y='sqft_living', labels={
                 "basement": "Structure", "sqft_living": "Average Area (m²)"
@@ -191,15 +203,9 @@ def insights(data):
 
             st.plotly_chart(graph, use_container_width=True)
 
-            variation = round(
-                ((basement.loc[1, 'sqft_living'] / basement.loc[0, 'sqft_living']) - 1) * 100, 2)
-
-            # Hipótese 4 
-            st.subheader('H4')
-            st.write('YoY (Year over Year) property price growth is 10%')
-            st.caption('That\'s Incorrect. YoY property price growth is 0.72%')
-
-            price_date = data[['price', 'year']].groupby('year').mean().reset_index()
+        # Hipótese 4 
+        with stage('insights.H4'):
+            price_date = hypothesis(results, 'H4')
 
             graph = px.bar(price_date, x='year', y='price', labels={
                 "year": "Year", "price": "Average Price (U$)"
@@ -207,27 +213,15 @@ def insights(data):
                             )
 
             graph.update_xaxes(type='category',
-                                tickvals=[2014, 2015],
-                                ticktext=['2014', '2015']
+                                tickvals=list(price_date['year']),
+                                ticktext=[str(year) for year in price_date['year']]
                                 )
 
             st.plotly_chart(graph, use_container_width=True)
 
-            # Hipótese 5
-
-            st.subheader('H4')
-            st.write('Homes with 3 bathrooms have a MoM (Month over Month) growth of 15%')
-            st.caption('That\'s Incorrect. YoY property price growth has no pattern')
-
-            mom_3_bathrooms = data.loc[data['bathrooms'] == 3, ['price', 'date']]
-
-            mom_3_bathrooms['date'] = pd.to_datetime(mom_3_bathrooms['date'].dt.strftime('%m-%Y'))
-
-            mom_3_bathrooms = mom_3_bathrooms.groupby('date').mean().reset_index()
-
-            mom_3_bathrooms['percentage change'] = mom_3_bathrooms['price'].pct_change() * 100
-
-            mom_3_bathrooms['variation sign'] =  mom_3_bathrooms['percentage change'].apply(lambda x: 'positive' if x > 0 else 'negative')
+        # Hipótese 5
+        with stage('insights.H5'):
+            mom_3_bathrooms = hypothesis(results, 'H5')
 
             graph4_1 = px.line(mom_3_bathrooms, x='date', y='price', labels={
                 "date": "Month/Year", "price": "Average Price (U$)"
@@ -245,212 +239,139 @@ def insights(data):
             st.plotly_chart(graph4_1, use_container_width=True)
             st.plotly_chart(graph4_2, use_container_width=True)
 
-        with col2:
-
-            #Hipótese 6:
-
-            st.subheader('H6')
-            st.write('Properties renovated from the year 2000 onwards are, on average, 25% more expensive.')
-            st.caption('That\'s Incorrect.  Properties renovated after 2000 are on average 43.22% more expensive.')
-
-            yr_renovated_price = data[['yr_renovated', 'price']].groupby('yr_renovated').mean().reset_index()
-            yr_renovated_price = yr_renovated_price.drop(yr_renovated_price[yr_renovated_price['yr_renovated'] == pd.to_datetime(1900, format='%Y')].index)
-
-            price_before_2000 = yr_renovated_price[yr_renovated_price['yr_renovated'] < pd.to_datetime(2000, format='%Y')]
-            price_after_2000 = yr_renovated_price[yr_renovated_price['yr_renovated'] >= pd.to_datetime(2000, format='%Y')]
+    with col2:
 
-            coluna_1 = ['Before 2000', 'After 2000']
-            coluna_2 = [price_before_2000['price'].mean(), price_after_2000['price'].mean()]
-
-            yr_renovated_price = {'Reform Period': coluna_1, 'Average Price (U$)': coluna_2}
-
-            yr_renovated_price = pd.DataFrame(yr_renovated_price)
+        #Hipótese 6:
+        with stage('insights.H6'):
+            yr_renovated_price = hypothesis(results, 'H6')
 
             graph = px.bar(yr_renovated_price, x='Reform Period', y='Average Price (U$)')
             st.plotly_chart(graph, use_container_width=True)
 
-            # Hipótese 7:
-
-            st.subheader('H7')
-            st.write('Properties with up to 2 bedrooms are, on average, 20% cheaper.')
-            st.caption('That\'s Incorrect.  Properties with up to 2 bedrooms are, on average, 37% cheaper.')
-
-            bedroom_smallest_2 = data[data['bedrooms'] <= 2]['price'].mean()
-            bedroom_larger_2 = data[data['bedrooms'] >= 2]['price'].mean()
-
-            column_0 = ['Up to 2', 'More than 2']
-            column_1 = [bedroom_smallest_2, bedroom_larger_2]
-
-            number_bedrooms_price = {'Number of bedrooms': column_0, 'Average Price (U$)': column_1}
-            number_bedrooms_price = pd.DataFrame(number_bedrooms_price)
+        # Hipótese 7:
+        with stage('insights.H7'):
+            number_bedrooms_price = hypothesis(results, 'H7')
 
             graph = px.bar(number_bedrooms_price, x='Number of bedrooms', y='Average Price (U$)')
             st.plotly_chart(graph, use_container_width=True)
 
-            # Hipótese 8:
-
-            st.subheader('H8')
-            st.write('Renovated properties are 40% more expensive than unrenovated properties.')
-            st.caption('That\'s Correct! Renovated properties are 43.37% more expensive than unrenovated properties.')
-
-            unrenovated_price = data[data['yr_renovated'] == pd.to_datetime('1900', format='%Y')]['price'].mean()
-            renovated_price = data[data['yr_renovated'] != pd.to_datetime('1900', format='%Y')]['price'].mean()
-
-            column_0 = ['unrenovated', 'renovated']
-            column_1 = [unrenovated_price, renovated_price]
-
-            reform = {'Condition': column_0, 'Average Price (U$)': column_1}
-            reform = pd.DataFrame(reform)
+        # Hipótese 8:
+        with stage('insights.H8'):
+            reform = hypothesis(results, 'H8')
 
             graph = px.bar(reform, x='Condition', y='Average Price (U$)')
             st.plotly_chart(graph, use_container_width=True)
 
-            # Hipótese 9 :
-
-            st.subheader('H9')
-            st.write('The best time to buy real estate is in winter, which is 20% cheaper than the rest of the year.')
-            st.caption('It is true that winter is the best time to buy real estate, however real estate is 4.85% cheaper in this period.')
+        # Hipótese 9 :
+        with stage('insights.H9'):
+            winter = hypothesis(results, 'H9')
 
             #Qual estação do ano é a melhor?
-
-            season_price = data[['season', 'price']].groupby('season').mean().reset_index()
-
-            graph9_1 = px.bar(season_price, x='season', y='price', labels={
+            graph9_1 = px.bar(results['H9']['seasons'], x='season', y='price', labels={
                 "season": "Real State Buying Season", "price": "Average Price (U$)"
             }
                             )
 
             #Em qual porcentagem?
-            price_winter = data[data['season'] == 'winter']['price'].mean()
-            price_rest_of_the_year = data[data['season'] != 'winter']['price'].mean()
-
-            coluna_0 = ['winter', 'rest of the year']
-            coluna_1 = [price_winter, price_rest_of_the_year]
-
-            winter = {'Property buying season': coluna_0, 'Average Price (U$)': coluna_1}
-            winter = pd.DataFrame(winter)
-
             graph9_2 = px.bar(winter, x='Property buying season', y='Average Price (U$)')
 
             st.plotly_chart(graph9_1, use_container_width=True)
             st.plotly_chart(graph9_2, use_container_width=True)
 
-            # Hipótese 10:
-
-            st.subheader('H10')
-            st.write('Properties with better conditions are on average 20% more expensive')
-            st.caption('That\'s Incorrect! Properties with best conditions are on average 0.46% more expensive.')
-
-            best_conditions = data[(data['condition'] == 4) | (data['condition'] == 5)]['price'].mean()
-            worst_conditions = data[(data['condition'] != 4) & (data['condition'] != 5)]['price'].mean()
-
-            variation = abs(round(((best_conditions /worst_conditions) - 1) * 100, 2))
-
-            column_0 = ['best', 'worst']
-            column_1 = [best_conditions, worst_conditions]
-
-            conditions = {'Property condition': column_0, 'Average Price (U$)': column_1}
-            conditions = pd.DataFrame(conditions)
+        # Hipótese 10:
+        with stage('insights.H10'):
+            conditions = hypothesis(results, 'H10')
 
             graph = px.bar(conditions, x='Property condition', y='Average Price (U$)')
             st.plotly_chart(graph, use_container_width=True)
 
-        st.title('Main Insights')
-        st.write('')
-        st.write(':black_medium_small_square: Given that beachfront properties are 212.64% more expensive, it is recommended not to buy them ')
-        st.write(':black_medium_small_square: Since renovated properties are 43.37% of those not renovated and the renovation period still increases the price (renovated after 2000 are on average 43.48% more expensive), it is recommended to buy unrenovated properties and renovate them afterwards.')
-        st.write(':black_medium_small_square: Since properties with up to 2 bedrooms are, on average, 37% cheaper, it is recommended to choose them.')
-        st.write(':black_medium_small_square: As properties purchased in winter are, on average, 4.85% cheaper than the rest of the year, it is suggested to purchase more properties in this period. ')
-        st.write(':black_medium_small_square: Since properties with better conditions are on average 0.6% more expensive, and since conditions do not influence the purchase price much, always opt for properties with best conditions.')
-
-def results(data):
-
-    if selected == 'Results':
+    st.title('Main Insights')
+    st.write('')
+    st.write(':black_medium_small_square: Given that beachfront properties are {0:.2f}% more expensive, it is recommended not to buy them '.format(results['H1']['variation']))
+    st.write(':black_medium_small_square: Since renovated properties are {0:.2f}% more expensive than those not renovated and the renovation period still increases the price (renovated after 2000 are on average {1:.2f}% more expensive), it is recommended to buy unrenovated properties and renovate them afterwards.'.format(results['H8']['variation'], results['H6']['variation']))
+    st.write(':black_medium_small_square: Since properties with up to 2 bedrooms are, on average, {0:.2f}% cheaper, it is recommended to choose them.'.format(results['H7']['variation']))
+    st.write(':black_medium_small_square: As properties purchased in winter are, on average, {0:.2f}% cheaper than the rest of the year, it is suggested to purchase more properties in this period. '.format(results['H9']['variation']))
+    st.write(':black_medium_small_square: Since properties with better conditions are on average {0:.2f}% more expensive, and since conditions do not influence the purchase price much, always opt for properties with best conditions.'.format(results['H10']['variation']))
 
-        #Tabela de Sugestão
-        st.title('Suggested Properties Table')
-
-        #criando tabela com a coluna de média de preço por região
-        data_grouped = data[['zipcode', 'price']].groupby('zipcode').median().reset_index()
-        data_grouped = data_grouped.rename(columns={'price': 'region_median_price'})
-        data_with_region_median = pd.merge(data, data_grouped, on='zipcode', how='inner')
-
-        #selecionando as colunas que vão para a tabela de sugestão
-        purchase_table = data_with_region_median[['id', 'zipcode', 'road', 'house_number', 'price', 'region_median_price', 'yr_built', 'waterfront', 'renovated', 'bedrooms', 'bathrooms',
-        'season', 'condition', 'lat', 'long']]
-
-        #criando coluna de status de sugestão
-        purchase_table['status'] = purchase_table.apply(lambda line: 'suggested' if (line['condition'] >= 4) and (line['price'] < line['region_median_price']) else 'not suggested', axis=1)
-
-        #melhorando leitura do título das colunas
-        purchase_table.rename(columns = {'season': 'season_of_sale', 'yr_built': 'construction_year'}, inplace = True)
+@st.cache(allow_output_mutation= True)
 
-        #filtrando apenas os imóveis sugeridos
-        purchase_table = purchase_table[purchase_table['status'] == 'suggested']
+def get_suggestions(path1, path2, version, pricing='zipcode'):
 
-        #criando coluna de melhor preço por estação
-        p_z_c_s = purchase_table[['zipcode', 'season_of_sale', 'price']].groupby(['zipcode', 'season_of_sale']).median().reset_index().sort_values(['zipcode', 'price'])
-        p_z_c_s = p_z_c_s.drop_duplicates(subset='zipcode', keep='last')
-        p_z_c_s = p_z_c_s.rename(columns={'season_of_sale': 'best_season_to_sell', 'price': 'best_price_per_season'})
-        purchase_table = pd.merge(purchase_table, p_z_c_s, on='zipcode', how='inner')
+    #índice da tabela de sugestão, compartilhado entre processos pelo cache de resultados
+    return get_result_cache().cached(['suggestions', 'store' if STORE_PATH else 'csv', version, pricing], lambda: build_suggestions(path1, path2, version, pricing))
 
-        #criando coluna de preço sugerido
-        purchase_table['suggested_price'] = purchase_table.apply( lambda line: (line['price'] + (line['price'] * 0.30)) if line['price'] < line[
-        'best_price_per_season'] else (line['price'] + line['price'] * 0.10), axis=1)
+def build_suggestions(path1, path2, version, pricing):
 
-        #criando coluna de lucro
-        purchase_table['profit'] = purchase_table.apply(lambda line: line['suggested_price'] - line['price'], axis=1)
+    #criando tabela de sugestão de compra e venda, uma vez por versão dos dados e modo de preço
+    data = get_data(path1, path2, version)
+    if pricing == 'comparables':
+        #mediana dos vizinhos comparáveis mais próximos (mesmos quartos e condição) no lugar da mediana do zipcode;
+        #a melhor estação é recalculada sobre os imóveis sugeridos neste modo.
+        from modules.comparables import neighborhood_median_price
+        purchase_table = purchase_suggestions(data, neighborhood_median_price(data).to_numpy())
+    elif STORE_PATH:
+        #sugestões já mantidas pelo store, recalculadas só nos zipcodes que receberam vendas novas
+        purchase_table = get_store(version).purchase_table
+    else:
+        #medianas lidas do cubo
+        region_median, best_seasons = suggestion_statistics(get_cube(path1, path2, version))
+        purchase_table = purchase_suggestions(data, region_median.reindex(data['zipcode']).to_numpy(), best_seasons)
 
-        #transformando o tipo da coluna construction_year para datetime
-        purchase_table['construction_year'] = purchase_table['construction_year'].dt.strftime('%Y')
+    #tirando virgulas separando dezenas da visualização do streamlit para colunas id e zipcode. 
+    purchase_table['id'] = purchase_table['id'].astype(str)
+    purchase_table['zipcode'] = purchase_table['zipcode'].astype(str)
 
-        #apagando colunas auxiliares 
-        purchase_table.drop(columns = ['region_median_price', 'season_of_sale', 'best_price_per_season', 'status'], inplace = True)
+    return SuggestionIndex(purchase_table)
 
-        #tirando virgulas separando dezenas da visualização do streamlit para colunas id e zipcode. 
-        purchase_table['id'] = purchase_table['id'].astype(str)
-        purchase_table['zipcode'] = purchase_table['zipcode'].astype(str)
- 
-        st.title('Insights Filter')
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            insight1 = st.checkbox('Remove renovated properties?', value=False)
-        with col2:
-            insight2 = st.checkbox('Remove properties with a water view?', value=False)
-        with col3:
-            insight3 = st.slider('Up to how many rooms?', 1, 11, 11)
+def filtered_suggestions(path1, path2, version, pricing, insight1, insight2, insight3):
 
-        if insight1 == False and insight2 == False:
+    #filtrando pelo índice pré-calculado da tabela de sugestão
+    suggestions = get_suggestions(path1, path2, version, pricing)
+    return suggestions.filter(insight1, insight2, insight3), suggestions.totals(insight1, insight2, insight3)
 
-            purchase_table1 = purchase_table[purchase_table['bedrooms'] <= insight3]
+def results(path1, path2, version, pricing):
 
-            view_financial_results_and_map(purchase_table1)
+    #Tabela de Sugestão
+    st.title('Suggested Properties Table')
 
-        elif insight1 == True and insight2 == False:
+    st.title('Insights Filter')
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        insight1 = st.checkbox('Remove renovated properties?', value=False)
+    with col2:
+        insight2 = st.checkbox('Remove properties with a water view?', value=False)
+    with col3:
+        insight3 = st.slider('Up to how many rooms?', 1, 11, 11)
 
-            purchase_table2 = purchase_table[(purchase_table['bedrooms'] <= insight3) & (purchase_table['renovated'] == 'no')]
+    #o filtro sobre o índice é barato: só o índice e as hipóteses ficam no cache de resultados
+    purchase_table, results_table = filtered_suggestions(path1, path2, version, pricing, insight1, insight2, insight3)
 
-            view_financial_results_and_map(purchase_table2)
+    view_financial_results_and_map(purchase_table, results_table, (path1, path2, version, pricing, insight1, insight2, insight3))
 
-        elif insight1 == False and insight2 == True:
-            purchase_table3 = purchase_table[(purchase_table['bedrooms'] <= insight3) & (purchase_table['waterfront'] == 'no')]
 
-            view_financial_results_and_map(purchase_table3)
+def profiling_panel():
 
-        elif insight1 == True and insight2 == True:
-            purchase_table4 = purchase_table[(purchase_table['bedrooms'] <= insight3) & (purchase_table['waterfront'] == 'no') & (purchase_table['renovated'] == 'no')]
+    #painel de depuração com os tempos por estágio, visível só com HOUSE_ROCKET_PROFILE=1
+    if profiling.ENABLED:
+        with st.sidebar.expander('Profiling'):
+            st.dataframe(profiling.summary())
+            st.download_button('Download metrics (JSON lines)', profiling.json_lines(), file_name='profiling.jsonl')
+        with st.sidebar.expander('Result cache'):
+            st.json(get_result_cache().stats())
 
-            view_financial_results_and_map(purchase_table4)
+def main(selected, path1, path2):
 
+    #apenas a página escolhida é montada; dados e tabelas derivadas são carregados sob demanda.
+    with stage('page.' + selected):
+        if selected == 'Introduction':
+            introduction()
+        elif selected == 'Insights':
+            insights(get_hypotheses(path1, path2, data_version(path1, path2)))
+        elif selected == 'Results':
+            pricing = st.sidebar.radio('Compare prices against', ['zipcode', 'comparables'],
+                                       format_func={'zipcode': 'Zipcode median', 'comparables': 'Nearest comparable sales'}.get)
+            results(path1, path2, data_version(path1, path2), pricing)
+    profiling_panel()
 
 if __name__ == '__main__':
-    path1 = r"data/kc_house_data.csv"
-    path2 = r"data/address.csv"
-    data = get_data(path1, path2)
-    data = data_manipulation(data)
-    introduction()
-    insights(data)
-    results(data)
-
-
-
+    main(selected, r"data/kc_house_data.csv", r"data/address.csv")
@@ -0,0 +1,144 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+import pandas as pd
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CACHE_PATH = 'data/geocode_cache.sqlite'
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+USER_AGENT = 'house_rocket_insights'
+
+logger = logging.getLogger(__name__)
+
+class NominatimBackend:
+
+    #geocodificação reversa em um servidor compatível com a API do Nominatim (pode ser um servidor local nos testes).
+
+    def __init__(self, url=NOMINATIM_URL, timeout=10):
+
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def __call__(self, query):
+
+        lat, long = query.split(',')
+        params = urlencode({'format': 'jsonv2', 'lat': lat, 'lon': long, 'addressdetails': 1})
+        request = Request('{0}/reverse?{1}'.format(self.url, params), headers={'User-Agent': USER_AGENT})
+
+        with urlopen(request, timeout=self.timeout) as response:
+            address = json.load(response).get('address', {})
+
+        return {'road': address.get('road'), 'house_number': address.get('house_number')}
+
+class RateLimiter:
+
+    #intervalo mínimo entre requisições, compartilhado por todas as threads.
+
+    def __init__(self, rate):
+
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+class GeocodeCache:
+
+    def __init__(self, path=CACHE_PATH):
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS geocode (query TEXT PRIMARY KEY, road TEXT, house_number TEXT)')
+
+    def get(self, queries):
+
+        found = {}
+        queries = list(queries)
+        #consultando em lotes para não passar do limite de parâmetros do SQLite.
+        for start in range(0, len(queries), 500):
+            batch = queries[start:start + 500]
+            rows = self.connection.execute('SELECT query, road, house_number FROM geocode WHERE query IN ({0})'.format(','.join('?' * len(batch))), batch)
+            found.update({query: {'road': road, 'house_number': house_number} for query, road, house_number in rows})
+        return found
+
+    def put(self, results):
+
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO geocode VALUES (?, ?, ?)',
+                                        [(query, result['road'], result['house_number']) for query, result in results.items()])
+
+    def close(self):
+
+        self.connection.close()
+
+def geocode(query, backend, limiter, retries):
+
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return backend(query)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(2 ** attempt)
+
+def reverse_geocode(queries, backend=None, cache_path=CACHE_PATH, workers=4, rate=1.0, retries=3, batch_size=100):
+
+    backend = backend or NominatimBackend()
+    cache = GeocodeCache(cache_path)
+
+    try:
+        #consultas repetidas são feitas uma vez só, e as que já estão no cache não vão para a rede.
+        unique = list(dict.fromkeys(queries))
+        results = cache.get(unique)
+        misses = [query for query in unique if query not in results]
+
+        limiter = RateLimiter(rate)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(geocode, query, backend, limiter, retries): query for query in misses}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    pending[query] = future.result()
+                except Exception as error:
+                    #falhas não vão para o cache, para serem tentadas de novo na próxima execução.
+                    logger.warning('geocoding failed for %s: %s', query, error)
+                    continue
+
+                if len(pending) >= batch_size:
+                    cache.put(pending)
+                    results.update(pending)
+                    pending = {}
+
+        cache.put(pending)
+        results.update(pending)
+    finally:
+        cache.close()
+
+    return results
+
+def get_address(data, **kwargs):
+
+    #monta o mesmo formato de data/address.csv: id, query (lat,long), road e house_number.
+    address = pd.DataFrame({'id': data['id'], 'query': data['lat'].astype(str) + ',' + data['long'].astype(str)})
+
+    results = pd.DataFrame.from_dict(reverse_geocode(address['query'], **kwargs), orient='index', columns=['road', 'house_number'])
+    results = results.reindex(address['query'])
+    address['road'] = results['road'].to_numpy()
+    address['house_number'] = results['house_number'].to_numpy()
+
+    return address
+
+if __name__ == '__main__':
+    data = pd.read_csv(r"data/kc_house_data.csv")
+    get_address(data).to_csv(r"data/address.csv", index=False)
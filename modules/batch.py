@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import glob
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from modules.dataset import read_sources, data_manipulation, concat_rows
+from modules.recommendation import purchase_suggestions
+from modules.suggestion_index import SuggestionIndex
+from modules.export import export_table
+from modules.streaming import SeenIds
+
+HOUSES_FILE = 'kc_house_data.csv'
+ADDRESSES_FILE = 'address.csv'
+
+def find_partitions(directory):
+
+    #cada partição é uma pasta (ou a própria pasta raiz) com kc_house_data.csv e address.csv.
+    partitions = []
+    for path in sorted(glob.glob(os.path.join(directory, '**', HOUSES_FILE), recursive=True)):
+        addresses = os.path.join(os.path.dirname(path), ADDRESSES_FILE)
+        if os.path.exists(addresses):
+            partitions.append((path, addresses))
+    return partitions
+
+def clean_partition(paths):
+
+    #leitura e limpeza de uma partição, no processo de trabalho. Os ids lidos voltam junto, inclusive os das vendas
+    #descartadas na limpeza, para a deduplicação entre partições.
+    sales = read_sources(*paths)
+    return np.unique(sales['id'].to_numpy()), data_manipulation(sales).reset_index(drop=True)
+
+def drop_seen_ids(partitions):
+
+    #como na base única, vale a primeira venda de cada id na ordem das partições: um id lido em uma partição anterior
+    #é descartado nas seguintes, mesmo que a venda anterior tenha sido removida na limpeza (33 quartos, células vazias).
+    seen = SeenIds()
+    for ids, data in partitions:
+        yield data[~seen.contains(data['id'].to_numpy())]
+        seen.add(ids)
+
+def score_zipcodes(data):
+
+    #mediana da região e melhor estação são calculadas por zipcode, então cada grupo de zipcodes é pontuado sozinho.
+    return purchase_suggestions(data)
+
+def zipcode_groups(data, groups):
+
+    #dividindo os zipcodes em grupos de tamanho parecido (em número de linhas), um por tarefa.
+    counts = data['zipcode'].value_counts().sort_index()
+    group = np.minimum((counts.cumsum().to_numpy() - 1) * groups // counts.sum(), groups - 1)
+    group_of_zipcode = pd.Series(group, index=counts.index)
+    for _, frame in data.groupby(group_of_zipcode.reindex(data['zipcode']).to_numpy(), sort=True):
+        yield frame
+
+def run(partitions, output, workers=None, remove_renovated=False, remove_waterfront=False, max_bedrooms=None):
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        #cada partição é lida e limpa em paralelo; ids repetidos entre partições são descartados depois.
+        data = concat_rows(list(drop_seen_ids(pool.map(clean_partition, partitions))))
+        purchase_table = pd.concat(pool.map(score_zipcodes, zipcode_groups(data, workers * 4)), ignore_index=True)
+
+    suggestions = SuggestionIndex(purchase_table)
+    purchase_table = suggestions.filter(remove_renovated, remove_waterfront, max_bedrooms)
+    totals = suggestions.totals(remove_renovated, remove_waterfront, max_bedrooms)
+
+    export_table(purchase_table, output)
+    return totals
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score House Rocket purchase suggestions without the dashboard.')
+    parser.add_argument('--listings', nargs='+', default=[], help='listing CSVs (kc_house_data.csv layout)')
+    parser.add_argument('--addresses', nargs='+', default=[], help='address CSVs, one per listing file')
+    parser.add_argument('--partitions', help='directory whose subdirectories each hold kc_house_data.csv and address.csv')
+    parser.add_argument('--output', required=True, help='suggested properties file (.parquet, .csv or .geojson)')
+    parser.add_argument('--totals', help='financial totals JSON (stdout by default)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--remove-renovated', action='store_true')
+    parser.add_argument('--remove-waterfront', action='store_true')
+    parser.add_argument('--max-bedrooms', type=int, default=None)
+    args = parser.parse_args()
+
+    if len(args.listings) != len(args.addresses):
+        parser.error('--listings and --addresses must have the same number of files')
+
+    partitions = list(zip(args.listings, args.addresses))
+    if args.partitions:
+        partitions += find_partitions(args.partitions)
+    if not partitions:
+        parser.error('no input files: use --listings/--addresses or --partitions')
+
+    totals = run(partitions, args.output, args.workers, args.remove_renovated, args.remove_waterfront, args.max_bedrooms)
+
+    if args.totals:
+        with open(args.totals, 'w') as f:
+            json.dump(totals, f, indent=2)
+    else:
+        json.dump(totals, sys.stdout, indent=2)
+        print()
@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import shutil
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from modules.dataset import read_sources, data_manipulation, memory_report, load_data
+from modules.recommendation import purchase_suggestions
+from modules.suggestion_index import SuggestionIndex
+from modules.comparables import neighborhood_median_price
+from modules.map_rendering import density_map
+from modules.streaming import CHUNKSIZE, stream_suggestions
+from modules.export import export_table
+from modules.synthetic import write_synthetic
+from modules.profiling import peak_rss
+
+SCALES = [20000, 1000000, 20000000]
+#linhas lidas com os tipos padrão do pandas para estimar os bytes por linha sem os tipos compactos.
+MEMORY_SAMPLE_ROWS = 100000
+STAGES = ['read_sources', 'data_manipulation', 'load_data_cold', 'load_data_warm', 'memory', 'results', 'comparables', 'filter_index', 'export', 'suggested_map', 'eager_pipeline', 'streaming_pipeline']
+
+#os buffers lembram o pool em que foram alocados e podem ser liberados depois da medição, então os pools de cada
+#medição nunca são destruídos.
+ARROW_POOLS = []
+
+def measure(function, *args, **kwargs):
+
+    #tempo e pico de memória alocada: tracemalloc acompanha os buffers do NumPy e do pandas, e um pool próprio do Arrow
+    #mede o que o pyarrow aloca (Feather, Parquet, CSV). O crescimento do pico de memória residente do processo pega
+    #o resto, mas só aparece quando o estágio passa do maior pico anterior.
+    previous_pool = pa.default_memory_pool()
+    pool = pa.proxy_memory_pool(previous_pool)
+    ARROW_POOLS.append(pool)
+    pa.set_memory_pool(pool)
+    rss = peak_rss()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        pa.set_memory_pool(previous_pool)
+    return result, {'seconds': seconds, 'peak_bytes': peak, 'arrow_peak_bytes': pool.max_memory(),
+                    'rss_peak_growth_bytes': peak_rss() - rss if rss is not None else None}
+
+def throughput(stats, rows):
+
+    stats['rows'] = rows
+    stats['rows_per_second'] = rows / stats['seconds'] if stats['seconds'] else None
+    return stats
+
+def render_map(purchase_table):
+
+    return density_map(purchase_table).get_root().render()
+
+def eager_pipeline(path1, path2):
+
+    return purchase_suggestions(data_manipulation(read_sources(path1, path2)))
+
+def run_scale(rows, directory, stages=STAGES, seed=0, chunksize=CHUNKSIZE):
+
+    path1, path2 = write_synthetic(rows, directory, seed=seed)
+    results = {}
+
+    data, stats = measure(read_sources, path1, path2)
+    if 'read_sources' in stages:
+        results['read_sources'] = throughput(stats, rows)
+
+    data, stats = measure(data_manipulation, data)
+    if 'data_manipulation' in stages:
+        results['data_manipulation'] = throughput(stats, rows)
+
+    if 'load_data_cold' in stages or 'load_data_warm' in stages:
+        #o que o get_data do dashboard faz: a primeira leitura monta o cache em Feather, as seguintes o leem mapeado em memória.
+        cache_dir = os.path.join(directory, 'cache')
+        for cache in ['cold', 'warm']:
+            cached, stats = measure(load_data, path1, path2, cache_dir)
+            if 'load_data_' + cache in stages:
+                results['load_data_' + cache] = throughput(stats, rows)
+            del cached
+
+    if 'memory' in stages:
+        #bytes por linha da base tratada, comparados aos das bases lidas com os tipos padrão do pandas (estimados
+        #nas primeiras MEMORY_SAMPLE_ROWS linhas, para não manter uma segunda cópia da base inteira).
+        raw = pd.merge(pd.read_csv(path1, nrows=MEMORY_SAMPLE_ROWS), pd.read_csv(path2), on='id', how='inner')
+        results['memory'] = {'raw_bytes_per_row': memory_report(raw).loc['total', 'bytes_per_row'],
+                             'bytes_per_row': memory_report(data).loc['total', 'bytes_per_row'],
+                             'columns': memory_report(data)['bytes_per_row'].drop('total').to_dict()}
+        del raw
+
+    purchase_table, stats = measure(purchase_suggestions, data)
+    if 'results' in stages:
+        results['results'] = throughput(stats, len(data))
+
+    if 'comparables' in stages:
+        _, stats = measure(neighborhood_median_price, data)
+        results['comparables'] = throughput(stats, len(data))
+    del data
+
+    if 'filter_index' in stages:
+        index, stats = measure(SuggestionIndex, purchase_table)
+        results['filter_index'] = throughput(stats, len(purchase_table))
+
+        #tempo de uma consulta de filtro (totais + posições) sobre o índice pronto.
+        start = time.perf_counter()
+        index.totals(True, True, 3)
+        index.positions(True, True, 3)
+        results['filter_index']['query_seconds'] = time.perf_counter() - start
+
+    if 'export' in stages:
+        #uma medição por formato, gravando em disco a tabela de sugestão inteira.
+        results['export'] = {}
+        for fmt in ['parquet', 'csv', 'geojson']:
+            path = os.path.join(directory, 'suggested.{0}'.format(fmt))
+            _, stats = measure(export_table, purchase_table, path)
+            results['export'][fmt] = throughput(stats, len(purchase_table))
+            results['export'][fmt]['file_bytes'] = os.path.getsize(path)
+
+            #o tracemalloc pesa nas muitas alocações pequenas do to_json; o tempo sem ele é medido à parte.
+            start = time.perf_counter()
+            export_table(purchase_table, path)
+            results['export'][fmt]['untraced_rows_per_second'] = len(purchase_table) / (time.perf_counter() - start)
+            os.remove(path)
+
+    if 'suggested_map' in stages:
+        purchase_table['id'] = purchase_table['id'].astype(str)
+        html, stats = measure(render_map, purchase_table)
+        results['suggested_map'] = throughput(stats, len(purchase_table))
+        results['suggested_map']['payload_bytes'] = len(html.encode())
+    del purchase_table
+
+    if 'eager_pipeline' in stages:
+        _, stats = measure(eager_pipeline, path1, path2)
+        results['eager_pipeline'] = throughput(stats, rows)
+
+    if 'streaming_pipeline' in stages:
+        output = os.path.join(directory, 'suggested.parquet')
+        _, stats = measure(stream_suggestions, path1, path2, output, chunksize=chunksize, spill_dir=directory)
+        results['streaming_pipeline'] = throughput(stats, rows)
+
+    return results
+
+#cada página do próprio dashboard, montada em um interpretador novo (como em um pod recém-criado). Fora do servidor do
+#Streamlit os widgets são trocados por objetos que devolvem o valor padrão e o mapa é só renderizado em HTML, então o
+#tempo medido é o das importações e dos cálculos do app, sem o custo do Streamlit em si.
+STARTUP_SCRIPT = """
+import sys, json, time, types, functools
+sys.path.insert(0, {root!r})
+
+class Element:
+
+    session_state = {{}}
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def cache(self, function=None, **kwargs):
+        return functools.lru_cache(maxsize=None)(function) if function is not None else self.cache
+
+    def columns(self, spec, **kwargs):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+
+    def checkbox(self, label, value=False, **kwargs):
+        return value
+
+    def slider(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        return value
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        return list(options)[index]
+
+    radio = selectbox
+
+    def button(self, label, **kwargs):
+        return False
+
+page = {page!r}
+menu = {{}}
+
+def option_menu(title, options, default_index=0, **kwargs):
+    menu['pages'] = list(options)
+    return page or options[default_index]
+
+element = Element()
+streamlit = types.ModuleType('streamlit')
+streamlit.__getattr__ = lambda name: getattr(element, name)
+sys.modules['streamlit'] = streamlit
+sys.modules['streamlit_option_menu'] = types.SimpleNamespace(option_menu=option_menu)
+sys.modules['streamlit_folium'] = types.SimpleNamespace(folium_static=lambda properties_map, **kwargs: properties_map.get_root().render())
+
+start = time.perf_counter()
+import insights_project_app as app
+imported = time.perf_counter()
+if page is None:
+    print(json.dumps({{'pages': menu['pages']}}))
+    sys.exit()
+app.main(page, {path1!r}, {path2!r})
+print(json.dumps({{'import_seconds': imported - start, 'page_seconds': time.perf_counter() - imported}}))
+"""
+
+def startup_page(page, path1, path2, directory):
+
+    #o app grava os caches em data/cache relativo à pasta de trabalho, então cada medição roda dentro de directory.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = STARTUP_SCRIPT.format(root=root, page=page, path1=os.path.abspath(path1), path2=os.path.abspath(path2))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, cwd=directory)
+    stats = {'total_seconds': time.perf_counter() - start}
+    if process.returncode == 0:
+        stats.update(json.loads(process.stdout.strip().splitlines()[-1]))
+    else:
+        stats['error'] = process.stderr.strip().splitlines()[-1]
+    return stats
+
+def startup(path1, path2):
+
+    #tempo até cada página do menu do app ficar pronta, com o cache em disco frio (primeira subida) e quente.
+    report = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, 'data', 'cache')
+        #sem página escolhida, o script só importa o app e devolve as opções do menu.
+        menu = startup_page(None, path1, path2, directory)
+        if 'error' in menu:
+            return {'app': menu}
+        for cache in ['cold', 'warm']:
+            for page in menu['pages']:
+                if cache == 'cold':
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                report.setdefault(page, {})[cache] = startup_page(page, path1, path2, directory)
+
+    return report
+
+def git_version():
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(scales=SCALES, stages=STAGES, seed=0, directory=None, chunksize=CHUNKSIZE):
+
+    report = {
+        'version': git_version(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'scales': [],
+    }
+
+    for rows in scales:
+        with tempfile.TemporaryDirectory(dir=directory) as scale_directory:
+            report['scales'].append({'rows': rows, 'stages': run_scale(rows, scale_directory, stages, seed, chunksize)})
+        print('{0} rows done'.format(rows), file=sys.stderr)
+
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the House Rocket pipeline stages on synthetic King County data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=SCALES)
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE, help='rows per chunk in the streaming pipeline')
+    parser.add_argument('--directory', default=None, help='where the synthetic CSVs are written (a temporary directory by default)')
+    parser.add_argument('--output', default=None, help='JSON report path (stdout by default)')
+    parser.add_argument('--startup', action='store_true', help='measure per-page cold/warm startup on the bundled data instead')
+    args = parser.parse_args()
+
+    if args.startup:
+        report = json.dumps({'version': git_version(), 'startup': startup(r"data/kc_house_data.csv", r"data/address.csv")}, indent=2)
+    else:
+        report = json.dumps(run(args.rows, args.stages, args.seed, args.directory, args.chunksize), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    else:
+        print(report)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from modules.profiling import profiled
+
+NEIGHBORS = 10
+COMPARABLE_BY = ['bedrooms', 'condition']
+
+def project(lat, long):
+
+    #graus de longitude encolhem com a latitude; escalando pelo cosseno da latitude média,
+    #a distância euclidiana fica proporcional à distância no terreno dentro do King County.
+    lat = np.asarray(lat, dtype='float64')
+    long = np.asarray(long, dtype='float64')
+    return np.column_stack([lat, long * np.cos(np.radians(lat.mean()))]) if len(lat) else np.empty((0, 2))
+
+class ComparablesIndex:
+
+    #uma KD-tree sobre lat/long por grupo de imóveis comparáveis (mesmo número de quartos e condição, por padrão).
+    #as consultas são feitas em lote por grupo, sem laço por imóvel.
+
+    @profiled('comparables.index')
+    def __init__(self, data, by=COMPARABLE_BY):
+
+        self.by = list(by)
+        self.price = data['price'].to_numpy(dtype='float64')
+        points = project(data['lat'], data['long'])
+
+        if self.by:
+            groups = data.groupby(self.by, observed=True, sort=False).indices
+        else:
+            groups = {(): np.arange(len(data))}
+
+        #posições (na tabela original) e árvore de cada grupo.
+        self.groups = {key: (positions, cKDTree(points[positions])) for key, positions in groups.items()}
+
+    @profiled('comparables.median')
+    def neighborhood_median(self, data, k=NEIGHBORS, exclude_self=True):
+
+        #mediana do preço dos k vizinhos comparáveis mais próximos de cada linha de data. Com exclude_self, data deve ser
+        #a mesma tabela usada no índice e cada imóvel não entra na própria mediana.
+        points = project(data['lat'], data['long'])
+        medians = np.full(len(data), np.nan)
+
+        if self.by:
+            queries = data.groupby(self.by, observed=True, sort=False).indices
+        else:
+            queries = {(): np.arange(len(data))}
+
+        for key, rows in queries.items():
+            if key not in self.groups:
+                continue
+            positions, tree = self.groups[key]
+            neighbors = min(k + exclude_self, len(positions))
+            if neighbors == exclude_self:
+                continue
+            if exclude_self:
+                #consultando na ordem das folhas da árvore, vizinhos em sequência reaproveitam os mesmos nós (~2x mais rápido).
+                rows = rows[tree.indices]
+            _, found = tree.query(points[rows], k=neighbors, workers=-1)
+            found = positions[found.reshape(len(rows), neighbors)]
+
+            if exclude_self:
+                keep = found != rows[:, None]
+                #se o próprio imóvel não veio entre os vizinhos (empate de distância), descarta-se o mais distante.
+                keep[~(~keep).any(axis=1), -1] = False
+                found = found[keep].reshape(len(rows), neighbors - 1)
+
+            medians[rows] = np.median(self.price[found], axis=1)
+
+        return medians
+
+def neighborhood_median_price(data, k=NEIGHBORS, by=COMPARABLE_BY):
+
+    #equivalente a region_median_price, com os k vizinhos comparáveis no lugar do zipcode inteiro. Imóveis sem
+    #nenhum comparável recebem a mediana do zipcode.
+    medians = ComparablesIndex(data, by).neighborhood_median(data, k)
+    missing = np.isnan(medians)
+    if missing.any():
+        medians[missing] = data.groupby('zipcode', observed=True)['price'].transform('median').to_numpy()[missing]
+    return pd.Series(medians, index=data.index)
@@ -0,0 +1,40 @@
+import pandas as pd
+from modules.profiling import profiled
+from modules.quantiles import GroupQuantiles
+from modules.hypotheses import aggregate
+from modules.recommendation import best_season_from_medians
+
+#chaves do agregado de preços: só as que a tabela de sugestão usa (mediana da região e melhor estação entre os imóveis
+#em boas condições), para que o número de entradas acompanhe o de grupos e não o de linhas.
+PRICE_KEYS = ['zipcode', 'season', 'condition']
+
+class PriceCube:
+
+    #agregados pequenos, um por finalidade: contagens de preço por zipcode (mediana da região) e por zipcode, estação
+    #e condição (melhor estação) para a sugestão, e somas e contagens por chave de cada hipótese para a página Insights.
+
+    @profiled('cube.build')
+    def __init__(self, data, relative_accuracy=None):
+
+        self.prices = GroupQuantiles(relative_accuracy, keys=PRICE_KEYS)
+        self.prices.update({'zipcode': data['zipcode'].to_numpy(dtype='int32'), 'season': data['season'].values,
+                            'condition': data['condition'].to_numpy(dtype='int8')}, data['price'].to_numpy())
+        self.zipcode_prices = self.prices.rollup(['zipcode'])
+        self.aggregates = aggregate(data)
+
+@profiled('cube.suggestion_statistics')
+def suggestion_statistics(cube):
+
+    #mediana do preço por zipcode e melhor estação de venda entre os imóveis sugeridos (condição >= 4 e abaixo da mediana).
+    prices = cube.prices
+    region_median = cube.zipcode_prices.medians()
+    if prices.counts is None:
+        return region_median, best_season_from_medians(pd.DataFrame({'zipcode': [], 'season': [], 'price': []}))
+
+    index = prices.counts.index
+    values = prices.value(index.get_level_values('value').to_numpy())
+    suggested = (index.get_level_values('condition').to_numpy() >= 4) & (values < region_median.reindex(index.get_level_values('zipcode')).to_numpy())
+
+    p_z_c_s = prices.rollup(['zipcode', 'season'], keep=suggested).medians().rename('price').reset_index()
+
+    return region_median, best_season_from_medians(p_z_c_s)
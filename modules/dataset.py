@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from modules.profiling import profiled
+
+CACHE_DIR = os.path.join('data', 'cache')
+CACHE_VERSION = 3
+
+#tipos compactos das duas bases. Os ids do King County passam de 2**31, então continuam int64;
+#o preço continua float64 para que as medianas sejam exatas. Os inteiros são lidos como anuláveis, para que
+#células vazias não interrompam a leitura (veja fill_empty_cells e data_manipulation).
+HOUSE_DTYPES = {
+    'id': 'int64', 'date': 'str', 'price': 'float64', 'bedrooms': 'Int8', 'bathrooms': 'float32',
+    'sqft_living': 'Int32', 'sqft_lot': 'Int32', 'floors': 'float32', 'waterfront': 'Int8', 'view': 'Int8',
+    'condition': 'Int8', 'grade': 'Int8', 'sqft_above': 'Int32', 'sqft_basement': 'Int32', 'yr_built': 'Int16',
+    'yr_renovated': 'Int16', 'zipcode': 'Int32', 'lat': 'float32', 'long': 'float32', 'sqft_living15': 'Int32',
+    'sqft_lot15': 'Int32',
+}
+
+#nomes de ruas e números se repetem muito: como categorias, cada valor distinto é guardado uma única vez.
+ADDRESS_DTYPES = {'id': 'int64', 'road': 'category', 'house_number': 'category'}
+
+@profiled('get_data.read_sources')
+def read_sources(path1, path2):
+
+    data = fill_empty_cells(pd.read_csv(path1, dtype=HOUSE_DTYPES))
+    data_address = pd.read_csv(path2, usecols=list(ADDRESS_DTYPES), dtype=ADDRESS_DTYPES)
+    data = pd.merge(data, data_address, on='id', how='inner')
+    return data
+
+#colunas em que uma célula vazia quer dizer ausência (sem reforma, sem porão, sem vista), lidas como zero.
+ZERO_WHEN_EMPTY = ['yr_renovated', 'sqft_basement', 'waterfront', 'view']
+
+def nullable_integers(data):
+
+    return [column for column, dtype in data.dtypes.items() if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_integer_dtype(dtype)]
+
+def compact_integers(data):
+
+    #colunas inteiras sem células vazias viram inteiros do NumPy, sem a máscara de nulos.
+    for column in nullable_integers(data):
+        if not data[column].hasnans:
+            data[column] = data[column].to_numpy(data[column].dtype.numpy_dtype)
+    return data
+
+def fill_empty_cells(data):
+
+    data[ZERO_WHEN_EMPTY] = data[ZERO_WHEN_EMPTY].fillna(0)
+    return compact_integers(data)
+
+#estação do ano de cada mês (índice 1 a 12), em códigos das categorias abaixo.
+SEASONS = ['autumn', 'spring', 'summer', 'winter']
+MONTH_SEASON_CODES = np.array([-1, 3, 3, 1, 1, 1, 2, 2, 2, 0, 0, 0, 3], dtype='int8')
+
+@profiled('data_manipulation')
+def data_manipulation(data):
+
+    #apagando id's duplicados 
+    data.drop_duplicates(subset=['id'], inplace=True, keep='first') 
+
+    #convertendo a coluna date para o tipo datetime
+    data['date'] = pd.to_datetime(data['date'])
+
+    #definindo o ano padrão 1900 para células contendo zero; os anos ficam como inteiros de 2 bytes, sem uma cópia em datetime.
+    data['yr_renovated'] = data['yr_renovated'].where(data['yr_renovated'] != 0, 1900)
+
+    #especificando quais propriedades foram reformadas.
+    data['renovated'] = yes_no(data['yr_renovated'] != 1900)
+
+    #Excluindo a linha do imóvel contendo 33 quartos, considerado um erro de digitação.
+    data = data.drop(data[data['bedrooms'] == 33].index)
+
+    #excluindo imóveis com outras células inteiras vazias (quartos, condição, zipcode...), sem valor para medianas e filtros.
+    data = compact_integers(data.dropna(subset=nullable_integers(data)))
+
+    #definindo quais propriedades têm um porão e quais não.
+    data['basement'] = pd.Categorical.from_codes(np.where(data['sqft_basement'] == 0, 1, 0), categories=['with basement', 'without basement'])
+
+    #criando uma coluna com ano.
+    data['year'] = data['date'].dt.year.astype('int16')
+
+    #criando uma coluna com a estação do ano.
+    data['season'] = data_season(data['date'])
+
+    #detalhando quais casas têm vista para o mar e quais não.
+    data['waterfront'] = yes_no(data['waterfront'] == 1)
+
+    #detalhando quais casas têm vista para o mar e quais não.
+    data['bathrooms'] = data['bathrooms'].round(2)
+
+    return data
+
+def concat_rows(frames):
+
+    #categorias (ruas, números) de tabelas vindas de arquivos ou lotes diferentes são unidas antes de concatenar,
+    #para as colunas continuarem categóricas.
+    frames = [frame.copy(deep=False) for frame in frames]
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype) and any(frame[column].dtype != frames[0][column].dtype for frame in frames):
+            categories = union_categoricals([frame[column].values for frame in frames], ignore_order=True).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def memory_report(data):
+
+    #bytes por coluna e por linha, contando o conteúdo das strings e os dicionários das categorias.
+    usage = data.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({'dtype': data.dtypes.astype(str), 'bytes': usage, 'bytes_per_row': usage / max(len(data), 1)})
+    report.loc['total'] = ['', usage.sum(), usage.sum() / max(len(data), 1)]
+    return report
+
+def data_season(dates):
+
+    return pd.Categorical.from_codes(MONTH_SEASON_CODES[dates.dt.month.to_numpy()], categories=SEASONS)
+
+def yes_no(mask):
+
+    return pd.Categorical.from_codes(np.asarray(mask, dtype='int8'), categories=['no', 'yes'])
+
+def file_hash(path):
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def source_manifest(paths, previous=None):
+
+    #só recalcula o hash dos arquivos cujo tamanho ou mtime mudou desde o último manifesto.
+    previous = previous or {}
+    manifest = {}
+    for path in paths:
+        stat = os.stat(path)
+        entry = previous.get(path)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+        manifest[path] = entry
+    return manifest
+
+def cache_key(manifest):
+
+    content = [CACHE_VERSION] + [[path, manifest[path]['sha256']] for path in sorted(manifest)]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()[:16]
+
+def write_json(path, content):
+
+    with open(path, 'w') as f:
+        json.dump(content, f)
+
+def write_atomic(path, write):
+
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def read_manifest(cache_dir):
+
+    manifest_path = os.path.join(cache_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def current_manifest(path1, path2, cache_dir):
+
+    #o manifesto atualizado é gravado, para que as próximas chamadas não recalculem o hash de arquivos que não mudaram.
+    previous = read_manifest(cache_dir)
+    manifest = source_manifest([path1, path2], previous)
+    if manifest != previous:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_atomic(os.path.join(cache_dir, 'manifest.json'), lambda tmp: write_json(tmp, manifest))
+    return manifest
+
+def dataset_version(path1, path2, cache_dir=CACHE_DIR):
+
+    #versão dos dados de origem (a mesma chave do cache em Feather); muda quando o conteúdo de algum arquivo muda.
+    return cache_key(current_manifest(path1, path2, cache_dir))
+
+@profiled('get_data')
+def load_data(path1, path2, cache_dir=CACHE_DIR):
+
+    #pyarrow só é carregado quando alguma página precisa dos dados.
+    import pyarrow.feather as feather
+
+    manifest = current_manifest(path1, path2, cache_dir)
+    cache_path = os.path.join(cache_dir, 'house_data_{0}.feather'.format(cache_key(manifest)))
+
+    if not os.path.exists(cache_path):
+        data = data_manipulation(read_sources(path1, path2)).reset_index(drop=True)
+        #sem compressão e em um único bloco por coluna, para que as colunas possam ser lidas direto do arquivo mapeado em memória.
+        write_atomic(cache_path, lambda tmp: feather.write_feather(data, tmp, compression='uncompressed', chunksize=max(len(data), 1)))
+
+        #removendo caches de versões anteriores dos arquivos.
+        for name in os.listdir(cache_dir):
+            if name.startswith('house_data_') and name.endswith('.feather') and os.path.join(cache_dir, name) != cache_path:
+                os.remove(os.path.join(cache_dir, name))
+
+    #split_blocks evita juntar as colunas em blocos 2D: colunas numéricas e datas viram vistas das páginas do arquivo,
+    #que o sistema operacional compartilha entre os processos que abrem o mesmo cache (só os dicionários das categorias são copiados).
+    return feather.read_table(cache_path, memory_map=True).to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,130 @@
+import io
+import os
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from modules.profiling import profiled
+
+CHUNKSIZE = 100000
+FORMATS = {'.parquet': 'parquet', '.csv': 'csv', '.geojson': 'geojson', '.json': 'geojson'}
+EXPORT_DIR = os.path.join('data', 'cache', 'exports')
+MAX_EXPORT_FILES = 8
+MIME_TYPES = {'parquet': 'application/octet-stream', 'csv': 'text/csv', 'geojson': 'application/geo+json'}
+
+def export_format(path):
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError('unknown export format for {0}: use one of {1}'.format(path, ', '.join(FORMATS)))
+    return FORMATS[extension]
+
+def chunked(frame, chunksize=CHUNKSIZE):
+
+    #uma tabela vazia ainda gera um bloco, para que Parquet e CSV saiam com o esquema e o cabeçalho.
+    for start in range(0, max(len(frame), 1), chunksize):
+        yield frame.iloc[start:start + chunksize]
+
+def arrow_batch(chunk):
+
+    #categorias viram texto: o mesmo esquema em todos os blocos, e o writer de CSV não aceita dicionários.
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    columns = [column.cast(pa.string()) if pa.types.is_dictionary(column.type) else column for column in table.columns]
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+def string_bytes(array):
+
+    #bytes de um array de strings sem nulos, lidos direto do buffer do Arrow (sem criar uma string Python por linha).
+    offsets = np.frombuffer(array.buffers()[1], dtype='int32')[array.offset:array.offset + len(array) + 1]
+    return memoryview(array.buffers()[2])[offsets[0]:offsets[-1]]
+
+def geojson_features(chunk):
+
+    #cada linha vira uma Feature de ponto, precedida de ',\n'. As propriedades vêm do to_json do pandas, e as partes
+    #são unidas coluna a coluna pelo Arrow, sem formatação linha a linha em Python.
+    records = chunk.drop(columns=['lat', 'long']).to_json(orient='records', lines=True).rstrip('\n')
+    properties = pc.split_pattern(pa.array([records]), '\n').flatten()
+    long = pc.cast(pa.array(chunk['long'].to_numpy()), pa.string())
+    lat = pc.cast(pa.array(chunk['lat'].to_numpy()), pa.string())
+    features = pc.binary_join_element_wise(',\n{"type":"Feature","geometry":{"type":"Point","coordinates":[', long, ',', lat,
+                                           ']},"properties":', properties, '}', '')
+    return string_bytes(features)
+
+def write_geojson(chunks, target):
+
+    target.write(b'{"type":"FeatureCollection","features":[')
+    first = True
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        features = geojson_features(chunk)
+        #sem a vírgula antes da primeira Feature.
+        target.write(features[1:] if first else features)
+        first = False
+    target.write(b'\n]}\n')
+
+def write_arrow(chunks, target, fmt):
+
+    writer = None
+    for chunk in chunks:
+        table = arrow_batch(chunk)
+        if writer is None:
+            writer = pq.ParquetWriter(target, table.schema) if fmt == 'parquet' else pa_csv.CSVWriter(target, table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+@profiled('export')
+def export_chunks(chunks, target, fmt):
+
+    #grava bloco a bloco em um arquivo binário aberto; a memória usada é a de um bloco.
+    if fmt == 'geojson':
+        write_geojson(chunks, target)
+    else:
+        write_arrow(chunks, target, fmt)
+
+def export_table(purchase_table, path, fmt=None, chunksize=CHUNKSIZE):
+
+    fmt = fmt or export_format(path)
+    with open(path, 'wb') as f:
+        export_chunks(chunked(purchase_table, chunksize), f, fmt)
+
+def cached_export(key, build, fmt, directory=EXPORT_DIR, max_files=MAX_EXPORT_FILES):
+
+    #arquivo para o botão de download do dashboard: gravado bloco a bloco em disco uma vez por chave, sem passar o
+    #arquivo inteiro pela memória. Só os max_files arquivos mais recentes são mantidos.
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, '{0}.{1}'.format(key, fmt))
+    if os.path.exists(path):
+        return path
+
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    export_table(build(), tmp_path, fmt)
+    os.replace(tmp_path, path)
+
+    files = [os.path.join(directory, name) for name in os.listdir(directory) if not name.endswith('.tmp')]
+    for old in sorted(files, key=os.path.getmtime, reverse=True)[max_files:]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass
+    return path
+
+def export_bytes(purchase_table, fmt, chunksize=CHUNKSIZE):
+
+    #conteúdo do arquivo em memória, para o botão de download do dashboard.
+    buffer = io.BytesIO()
+    export_chunks(chunked(purchase_table, chunksize), buffer, fmt)
+    return buffer.getvalue()
+
+def totals_json(totals):
+
+    #tabela de resultados financeiros (número de imóveis, investimento e lucro totais).
+    return json.dumps({name: float(value) if name != 'Number of Properties' else int(value) for name, value in totals.items()}, indent=2)
+
+def totals_csv(totals):
+
+    return pd.DataFrame([totals]).to_csv(index=False)
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+from modules.profiling import profiled
+
+#diferença máxima, em pontos percentuais, entre a variação medida e a afirmada para a hipótese ser considerada correta.
+TOLERANCE = 5.0
+
+#enunciado, variação afirmada (%) e sentido da comparação (1: mais caro/maior, -1: mais barato/menor).
+HYPOTHESES = {
+    'H1': ('Properties that overlook the water are 30% more expensive, on average.', 30, 1),
+    'H2': ('Properties with a construction date less than 1955 are 50% cheaper, on average.', 50, -1),
+    'H3': ('Properties without a basement are 50% larger than those with a basement.', 50, 1),
+    'H4': ('YoY (Year over Year) property price growth is 10%', 10, 1),
+    'H5': ('Homes with 3 bathrooms have a MoM (Month over Month) growth of 15%', 15, 1),
+    'H6': ('Properties renovated from the year 2000 onwards are, on average, 25% more expensive.', 25, 1),
+    'H7': ('Properties with up to 2 bedrooms are, on average, 20% cheaper.', 20, -1),
+    'H8': ('Renovated properties are 40% more expensive than unrenovated properties.', 40, 1),
+    'H9': ('The best time to buy real estate is in winter, which is 20% cheaper than the rest of the year.', 20, -1),
+    'H10': ('Properties with better conditions are on average 20% more expensive', 20, 1),
+}
+
+def dimensions(data):
+
+    #chaves de agrupamento de cada hipótese; as somas e contagens por chave bastam para todas elas.
+    three_bathrooms = data['bathrooms'] == 3
+    return {
+        'waterfront': data['waterfront'],
+        'built_1955': np.sign(data['yr_built'] - 1955),
+        'basement': data['basement'],
+        'year': data['year'],
+        'month_3_bathrooms': data.loc[three_bathrooms, 'date'].dt.to_period('M').dt.to_timestamp(),
+        'yr_renovated': data['yr_renovated'],
+        'bedrooms': data['bedrooms'],
+        'renovated': data['renovated'],
+        'season': data['season'],
+        'condition': data['condition'],
+    }
+
+@profiled('insights.aggregate')
+def aggregate(data):
+
+    values = data[['price', 'sqft_living']]
+    aggregates = {}
+    for name, key in dimensions(data).items():
+        aggregates[name] = values.loc[key.index].groupby(key.rename(name), observed=True).agg(
+            price_sum=('price', 'sum'), sqft_living_sum=('sqft_living', 'sum'), count=('price', 'size'))
+    return aggregates
+
+def aggregate_cube(cube):
+
+    #os agregados das hipóteses já calculados pelo cubo.
+    return cube.aggregates
+
+def combine(left, right):
+
+    #somando somas e contagens de dois conjuntos de agregados.
+    combined = {}
+    for name in right:
+        if name not in left:
+            combined[name] = right[name]
+            continue
+        combined[name] = left[name].add(right[name], fill_value=0).sort_index()
+    return combined
+
+def group_means(table, column='price'):
+
+    return table['{0}_sum'.format(column)] / table['count']
+
+def subset_mean(table, mask, column='price'):
+
+    return table.loc[mask, '{0}_sum'.format(column)].sum() / table.loc[mask, 'count'].sum()
+
+def relative(value, reference):
+
+    return ((value / reference) - 1) * 100
+
+def result(hypothesis, variation, finding, table, **extra):
+
+    statement, claimed, direction = HYPOTHESES[hypothesis]
+
+    #variação no sentido da afirmação: positiva quando o efeito tem o sentido afirmado.
+    variation = variation * direction
+    holds = bool(abs(variation - claimed) <= TOLERANCE)
+    words = ('more expensive', 'cheaper') if direction == 1 else ('cheaper', 'more expensive')
+    word = words[0] if variation >= 0 else words[1]
+
+    caption = ('That\'s Correct! ' if holds else 'That\'s Incorrect. ') + finding.format(variation=abs(variation), signed=variation, word=word)
+    return dict(hypothesis=statement, claimed=claimed, variation=variation, holds=holds, caption=caption, table=table, **extra)
+
+@profiled('insights.compute_hypotheses')
+def compute_hypotheses(aggregates):
+
+    results = {}
+
+    #H1: preço médio por vista para o mar.
+    waterfront = aggregates['waterfront']
+    table = group_means(waterfront).rename('price').reset_index()
+    results['H1'] = result('H1', relative(subset_mean(waterfront, waterfront.index == 'yes'), subset_mean(waterfront, waterfront.index == 'no')),
+                           'Waterfront properties are {variation:.2f}% {word}.', table)
+
+    #H2: construídos antes e depois de 1955 (o ano de 1955 fica de fora, como na análise original).
+    built_1955 = aggregates['built_1955']
+    before_1955 = subset_mean(built_1955, built_1955.index < 0)
+    after_1955 = subset_mean(built_1955, built_1955.index > 0)
+    table = pd.DataFrame({'Construction Period': ['before 1955', 'after 1955'], 'Price': [before_1955, after_1955]})
+    results['H2'] = result('H2', relative(before_1955, after_1955),
+                           'Properties with a construction date less than 1955 are {variation:.2f}% {word}, on average.', table)
+
+    #H3: área média com e sem porão.
+    basement = aggregates['basement']
+    table = group_means(basement, 'sqft_living').rename('sqft_living').reset_index()
+    variation = relative(subset_mean(basement, basement.index == 'without basement', 'sqft_living'),
+                         subset_mean(basement, basement.index == 'with basement', 'sqft_living'))
+    finding = 'Properties without a basement are {variation:.2f}% ' + ('larger' if variation >= 0 else 'smaller') + ' than those with a basement.'
+    results['H3'] = result('H3', variation, finding, table)
+
+    #H4: crescimento médio ano a ano do preço médio.
+    table = group_means(aggregates['year']).rename('price').reset_index()
+    results['H4'] = result('H4', table['price'].pct_change().mean() * 100,
+                           'YoY property price growth is {signed:.2f}%', table)
+
+    #H5: variação mês a mês do preço médio dos imóveis com 3 banheiros.
+    table = group_means(aggregates['month_3_bathrooms']).rename('price').reset_index().rename(columns={'month_3_bathrooms': 'date'})
+    table['percentage change'] = table['price'].pct_change() * 100
+    table['variation sign'] = np.where(table['percentage change'] > 0, 'positive', 'negative')
+    finding = 'MoM price growth averages {signed:.2f}%, ranging from ' + '{0:.2f}% to {1:.2f}%'.format(table['percentage change'].min(), table['percentage change'].max())
+    results['H5'] = result('H5', table['percentage change'].mean(), finding, table)
+
+    #H6: média das médias anuais de preço dos reformados antes e a partir de 2000.
+    yr_renovated = aggregates['yr_renovated']
+    yearly = group_means(yr_renovated[yr_renovated.index != 1900])
+    before_2000 = yearly[yearly.index < 2000].mean()
+    after_2000 = yearly[yearly.index >= 2000].mean()
+    table = pd.DataFrame({'Reform Period': ['Before 2000', 'After 2000'], 'Average Price (U$)': [before_2000, after_2000]})
+    results['H6'] = result('H6', relative(after_2000, before_2000),
+                           'Properties renovated after 2000 are on average {variation:.2f}% {word}.', table)
+
+    #H7: até 2 quartos contra 2 ou mais quartos.
+    bedrooms = aggregates['bedrooms']
+    up_to_2 = subset_mean(bedrooms, bedrooms.index <= 2)
+    more_than_2 = subset_mean(bedrooms, bedrooms.index >= 2)
+    table = pd.DataFrame({'Number of bedrooms': ['Up to 2', 'More than 2'], 'Average Price (U$)': [up_to_2, more_than_2]})
+    results['H7'] = result('H7', relative(up_to_2, more_than_2),
+                           'Properties with up to 2 bedrooms are, on average, {variation:.2f}% {word}.', table)
+
+    #H8: reformados contra não reformados.
+    renovated = aggregates['renovated']
+    unrenovated_price = subset_mean(renovated, renovated.index == 'no')
+    renovated_price = subset_mean(renovated, renovated.index == 'yes')
+    table = pd.DataFrame({'Condition': ['unrenovated', 'renovated'], 'Average Price (U$)': [unrenovated_price, renovated_price]})
+    results['H8'] = result('H8', relative(renovated_price, unrenovated_price),
+                           'Renovated properties are {variation:.2f}% {word} than unrenovated properties.', table)
+
+    #H9: preço médio por estação e inverno contra o resto do ano.
+    season = aggregates['season']
+    seasons = group_means(season).rename('price').reset_index()
+    price_winter = subset_mean(season, season.index == 'winter')
+    price_rest_of_the_year = subset_mean(season, season.index != 'winter')
+    table = pd.DataFrame({'Property buying season': ['winter', 'rest of the year'], 'Average Price (U$)': [price_winter, price_rest_of_the_year]})
+    results['H9'] = result('H9', relative(price_winter, price_rest_of_the_year),
+                           'Real estate is {variation:.2f}% {word} in winter than in the rest of the year.', table, seasons=seasons)
+
+    #H10: melhores condições (4 e 5) contra as demais.
+    condition = aggregates['condition']
+    best_conditions = subset_mean(condition, np.isin(condition.index, [4, 5]))
+    worst_conditions = subset_mean(condition, ~np.isin(condition.index, [4, 5]))
+    table = pd.DataFrame({'Property condition': ['best', 'worst'], 'Average Price (U$)': [best_conditions, worst_conditions]})
+    results['H10'] = result('H10', relative(best_conditions, worst_conditions),
+                            'Properties with best conditions are on average {variation:.2f}% {word}.', table)
+
+    return results
+
+class HypothesisEngine:
+
+    #mantém somas e contagens por chave; novas vendas atualizam os agregados sem reler a base inteira.
+
+    def __init__(self, data=None, aggregates=None):
+
+        self.aggregates = aggregates or {}
+        self._results = None
+        if data is not None:
+            self.add(data)
+
+    def add(self, data):
+
+        self.aggregates = combine(self.aggregates, aggregate(data))
+        self._results = None
+
+    def results(self):
+
+        if self._results is None:
+            self._results = compute_hypotheses(self.aggregates)
+        return self._results
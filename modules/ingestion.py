@@ -0,0 +1,148 @@
+import pickle
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from modules.dataset import read_sources, data_manipulation, concat_rows, write_atomic, source_manifest, cache_key
+from modules.hypotheses import HypothesisEngine
+from modules.recommendation import purchase_suggestions
+from modules.export import export_table
+from modules.profiling import profiled
+
+def write_pickle(path, content):
+
+    with open(path, 'wb') as f:
+        pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def write_text(path, content):
+
+    with open(path, 'w') as f:
+        f.write(content)
+
+def rows_hash(version, sales):
+
+    #a nova versão encadeia a anterior com o conteúdo das vendas que entraram.
+    digest = hashlib.sha256((version or '').encode())
+    digest.update(pd.util.hash_pandas_object(sales, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def version_path(path):
+
+    return path + '.version'
+
+def store_version(path):
+
+    #versão gravada ao lado do store, lida pelo dashboard sem carregar o store inteiro.
+    with open(version_path(path)) as f:
+        return f.read().strip()
+
+class SalesStore:
+
+    #base deduplicada por id, guardada em partições por zipcode, com as estatísticas que a sugestão usa. A cada lote
+    #de vendas novas, as somas das hipóteses são ajustadas pelo lote, e só as partições dos zipcodes afetados recebem
+    #as linhas novas e têm mediana, melhor estação e sugestões recalculadas.
+    #Como em data_manipulation sobre a base inteira, vale a primeira venda de cada id: vendas de ids que já passaram
+    #pelo store são ignoradas (append devolve quantas), e o resultado é o mesmo de ler a base e todos os lotes de uma vez.
+    #save e load gravam e leem o store inteiro em um único pickle: o custo de persistir cresce com o histórico, não com o lote.
+
+    def __init__(self, data, ids=None, version=None):
+
+        data = data.reset_index(drop=True)
+        self.version = version
+        #ids de todas as vendas vistas, inclusive as descartadas na limpeza (como o imóvel de 33 quartos).
+        self.ids = set((data['id'] if ids is None else ids).tolist())
+        self.hypotheses = HypothesisEngine(data)
+        self.region_median = data.groupby('zipcode', sort=True)['price'].median()
+
+        purchase_table = purchase_suggestions(data, self.region_median.reindex(data['zipcode']).to_numpy())
+        self.empty_data, self.empty_suggestions = data.iloc[:0], purchase_table.iloc[:0]
+        self.partitions = {int(zipcode): rows.reset_index(drop=True) for zipcode, rows in data.groupby('zipcode', sort=True)}
+        self.suggestions = {int(zipcode): rows.reset_index(drop=True) for zipcode, rows in purchase_table.groupby('zipcode', sort=True)}
+
+    @classmethod
+    def from_sources(cls, path1, path2):
+
+        sales = read_sources(path1, path2)
+        return cls(data_manipulation(sales.copy()), sales['id'], cache_key(source_manifest([path1, path2])))
+
+    @property
+    def data(self):
+
+        return concat_rows([self.empty_data] + list(self.partitions.values()))
+
+    @property
+    def purchase_table(self):
+
+        return concat_rows([self.empty_suggestions] + list(self.suggestions.values()))
+
+    @profiled('ingestion.append')
+    def append(self, sales):
+
+        #sales tem o formato de read_sources (vendas já unidas aos endereços). O custo depende do lote e das
+        #partições que ele toca, não do tamanho da base. Devolve os zipcodes recalculados e o número de vendas ignoradas.
+        ids = sales['id'].tolist()
+        new = np.fromiter((sale not in self.ids for sale in ids), dtype=bool, count=len(ids))
+        #o lote pode repetir um id: só a primeira venda de cada um conta como nova.
+        new[new] = ~sales.loc[new, 'id'].duplicated().to_numpy()
+        ignored = int(len(new) - new.sum())
+        sales = sales[new]
+        self.ids.update(sales['id'].tolist())
+
+        delta = data_manipulation(sales.copy()).reset_index(drop=True)
+        if len(delta) == 0:
+            return np.array([], dtype=self.empty_data['zipcode'].dtype), ignored
+        self.hypotheses.add(delta)
+        self.version = rows_hash(self.version, sales)
+
+        #a mediana e a melhor estação dependem só das vendas do próprio zipcode.
+        for zipcode, rows in delta.groupby('zipcode', sort=True):
+            zipcode = int(zipcode)
+            partition = self.partitions.get(zipcode)
+            partition = rows.reset_index(drop=True) if partition is None else concat_rows([partition, rows])
+            self.partitions[zipcode] = partition
+            self.region_median.loc[zipcode] = partition['price'].median()
+            self.suggestions[zipcode] = purchase_suggestions(partition, np.full(len(partition), self.region_median.loc[zipcode]))
+
+        self.region_median = self.region_median.sort_index()
+        return np.unique(delta['zipcode'].to_numpy()), ignored
+
+    def save(self, path):
+
+        #o store é gravado antes da versão: quem lê a versão nova sempre encontra o store correspondente.
+        write_atomic(path, lambda tmp: write_pickle(tmp, self))
+        write_atomic(version_path(path), lambda tmp: write_text(tmp, self.version or ''))
+
+    @staticmethod
+    def load(path):
+
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+if __name__ == '__main__':
+    #rodando com python -m, a classe precisa vir do módulo importado para que o pickle possa ser lido pelo dashboard.
+    from modules.ingestion import SalesStore
+
+    parser = argparse.ArgumentParser(description='Append new House Rocket sales to a saved store and re-score the affected zipcodes (the first sale of each id is kept).')
+    parser.add_argument('--store', required=True, help='store file; created from --base-listings/--base-addresses when missing')
+    parser.add_argument('--base-listings', default=r"data/kc_house_data.csv")
+    parser.add_argument('--base-addresses', default=r"data/address.csv")
+    parser.add_argument('--listings', nargs='+', default=[], help='delta listing CSVs (kc_house_data.csv layout)')
+    parser.add_argument('--addresses', nargs='+', default=[], help='delta address CSVs, one per listing file')
+    parser.add_argument('--output', default=None, help='suggested properties file (.parquet, .csv or .geojson)')
+    args = parser.parse_args()
+
+    if len(args.listings) != len(args.addresses):
+        parser.error('--listings and --addresses must have the same number of files')
+
+    try:
+        store = SalesStore.load(args.store)
+    except FileNotFoundError:
+        store = SalesStore.from_sources(args.base_listings, args.base_addresses)
+
+    for paths in zip(args.listings, args.addresses):
+        affected, ignored = store.append(read_sources(*paths))
+        print('{0}: {1} zipcodes re-scored, {2} sales of ids already in the store ignored'.format(paths[0], len(affected), ignored))
+
+    store.save(args.store)
+    if args.output:
+        export_table(store.purchase_table, args.output)
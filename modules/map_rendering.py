@@ -0,0 +1,61 @@
+import numpy as np
+import folium
+from folium.plugins import FastMarkerCluster, HeatMap
+from modules.profiling import profiled
+
+#acima deste número de pontos o mapa de marcadores vira um mapa de calor agregado em grade.
+HEATMAP_THRESHOLD = 20000
+
+#lado da célula da grade em graus (aproximadamente 500 m em Seattle).
+GRID_CELL_SIZE = 0.005
+
+#os marcadores são criados no navegador a partir das linhas [lat, long, id, price],
+#e o texto do popup só é montado quando o popup é aberto.
+POPUP_CALLBACK = """function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(function () { return 'id: ' + row[2] + '. price: U$' + row[3]; });
+    return marker;
+}"""
+
+def grid_aggregate(lat, long, cell_size=GRID_CELL_SIZE):
+
+    #agrupando os pontos por célula da grade: centro de cada célula ocupada e número de pontos nela.
+    lat_cell = np.floor(lat / cell_size).astype('int64')
+    long_cell = np.floor(long / cell_size).astype('int64')
+    long_min = long_cell.min()
+    width = long_cell.max() - long_min + 1
+
+    cells, counts = np.unique(lat_cell * width + (long_cell - long_min), return_counts=True)
+
+    cell_lat = (cells // width + 0.5) * cell_size
+    cell_long = (cells % width + long_min + 0.5) * cell_size
+    return cell_lat, cell_long, counts
+
+@profiled('suggested_map.density_map')
+def density_map(data, mode='auto', heatmap_threshold=HEATMAP_THRESHOLD):
+
+    lat = data['lat'].to_numpy(dtype='float64')
+    long = data['long'].to_numpy(dtype='float64')
+
+    if len(lat) == 0:
+        return folium.Map()
+
+    density_map = folium.Map(location=[lat.mean(), long.mean()],
+                             default_zoom_start=15)
+
+    if mode == 'auto':
+        mode = 'heatmap' if len(lat) > heatmap_threshold else 'cluster'
+
+    if mode == 'cluster':
+        rows = list(zip(lat.tolist(), long.tolist(), data['id'].tolist(), data['price'].tolist()))
+        FastMarkerCluster(rows, callback=POPUP_CALLBACK).add_to(density_map)
+
+    elif mode == 'heatmap':
+        cell_lat, cell_long, counts = grid_aggregate(lat, long)
+        weights = counts / counts.max()
+        HeatMap(np.column_stack([cell_lat, cell_long, weights]).tolist()).add_to(density_map)
+
+    else:
+        raise ValueError('unknown map mode: {0}'.format(mode))
+
+    return density_map
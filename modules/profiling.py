@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import logging
+import functools
+import contextlib
+import tracemalloc
+from collections import deque
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#ligado pela variável de ambiente HOUSE_ROCKET_PROFILE=1 (ou por enable()); desligado, cada ponto
+#instrumentado custa apenas a leitura desta flag.
+ENABLED = os.environ.get('HOUSE_ROCKET_PROFILE', '') not in ('', '0')
+MAX_RECORDS = 1000
+
+records = deque(maxlen=MAX_RECORDS)
+logger = logging.getLogger(__name__)
+
+NULL_STAGE = contextlib.nullcontext()
+
+def enable(flag=True):
+
+    global ENABLED
+    ENABLED = flag
+
+def peak_rss():
+
+    #pico de memória residente do processo, em bytes (ru_maxrss vem em KB no Linux e em bytes no macOS).
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class Stage:
+
+    def __init__(self, name):
+
+        self.name = name
+
+    def __enter__(self):
+
+        self.rss = peak_rss()
+        self.traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+
+        record = {
+            'stage': self.name,
+            'time': time.time(),
+            'seconds': time.perf_counter() - self.start,
+            'cpu_seconds': time.process_time() - self.cpu,
+            'peak_rss_growth_bytes': peak_rss() - self.rss if self.rss is not None else None,
+            #só com tracemalloc ligado (PYTHONTRACEMALLOC=1): memória alocada que continuou em uso ao fim do estágio.
+            'traced_bytes': tracemalloc.get_traced_memory()[0] - self.traced if self.traced is not None else None,
+        }
+        records.append(record)
+        logger.debug(json.dumps(record))
+        return False
+
+def stage(name):
+
+    return Stage(name) if ENABLED else NULL_STAGE
+
+def profiled(name):
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with Stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def summary():
+
+    #tempos por estágio: chamadas, total, média, máximo e a última medição.
+    frame = pd.DataFrame(list(records), columns=['stage', 'time', 'seconds', 'cpu_seconds', 'peak_rss_growth_bytes', 'traced_bytes'])
+    return frame.groupby('stage').agg(calls=('seconds', 'size'), total_seconds=('seconds', 'sum'), mean_seconds=('seconds', 'mean'),
+                                      max_seconds=('seconds', 'max'), last_seconds=('seconds', 'last'),
+                                      peak_rss_growth_bytes=('peak_rss_growth_bytes', 'max')).sort_values('total_seconds', ascending=False)
+
+def json_lines():
+
+    #uma medição por linha (JSON lines), no formato aceito por coletores de log e métricas.
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+def export(path):
+
+    with open(path, 'a') as f:
+        f.write(json_lines())
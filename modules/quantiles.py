@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+#balde dos valores menores ou iguais a zero no modo aproximado.
+ZERO_BUCKET = np.iinfo('int32').min
+
+class GroupQuantiles:
+
+    #contagem de valores por grupo, somável entre blocos. Sem relative_accuracy as contagens são por valor
+    #distinto e as medianas são exatas; com ela, os valores caem em baldes logarítmicos (como no DDSketch)
+    #e cada mediana tem erro relativo de no máximo relative_accuracy. keys nomeia as chaves de grupo, para que
+    #medians() devolva o índice certo mesmo sem nenhum valor contado.
+
+    def __init__(self, relative_accuracy=None, keys=None):
+
+        self.relative_accuracy = relative_accuracy
+        self.keys = keys
+        if relative_accuracy is not None:
+            self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+            self.log_gamma = np.log(self.gamma)
+        self.counts = None
+
+    def bucket(self, values):
+
+        if self.relative_accuracy is None:
+            return values
+        #valores não positivos não têm logaritmo: caem todos no balde ZERO_BUCKET, que vale 0.
+        values = np.asarray(values, dtype='float64')
+        positive = values > 0
+        buckets = np.full(len(values), ZERO_BUCKET, dtype='int32')
+        buckets[positive] = np.ceil(np.log(values[positive]) / self.log_gamma)
+        return buckets
+
+    def value(self, buckets):
+
+        if self.relative_accuracy is None:
+            return buckets.astype('float64')
+        return np.where(buckets == ZERO_BUCKET, 0.0, 2 * self.gamma ** buckets.astype('float64') / (self.gamma + 1))
+
+    def update(self, keys, values):
+
+        frame = pd.DataFrame(keys)
+        if len(frame) == 0:
+            return
+        frame['value'] = self.bucket(np.asarray(values))
+        counts = frame.groupby(list(frame.columns)).size()
+
+        if self.counts is not None:
+            counts = self.counts.add(counts, fill_value=0).astype('int64')
+        self.counts = counts
+
+    def empty(self):
+
+        keys = self.keys or []
+        if len(keys) > 1:
+            index = pd.MultiIndex.from_arrays([[]] * len(keys), names=keys)
+        else:
+            index = pd.Index([], name=keys[0] if keys else None)
+        return pd.Series([], index=index, dtype='float64')
+
+    def medians(self):
+
+        counts = self.counts
+        if counts is None or len(counts) == 0:
+            return self.empty()
+        counts = counts.sort_index()
+        count = counts.to_numpy()
+        values = self.value(counts.index.get_level_values(-1).to_numpy())
+
+        #início de cada grupo: onde algum nível da chave (todos menos o último, o valor) muda.
+        codes = counts.index.codes[:-1]
+        changed = np.zeros(len(counts), dtype=bool)
+        changed[0] = True
+        for level in codes:
+            changed[1:] |= level[1:] != level[:-1]
+        starts = np.flatnonzero(changed)
+
+        cum = np.cumsum(count)
+        previous = cum[starts] - count[starts]
+        total = np.add.reduceat(count, starts)
+
+        #valor na posição k (base 0) de cada grupo: o balde em que a contagem acumulada passa de k.
+        def at_rank(k):
+            return values[np.searchsorted(cum, previous + k, side='right')]
+
+        return pd.Series((at_rank((total - 1) // 2) + at_rank(total // 2)) / 2, index=counts.index.droplevel(-1)[starts])
+
+    def rollup(self, keys, keep=None):
+
+        #as mesmas contagens somadas sobre um subconjunto das chaves; keep escolhe as entradas (chave, valor) somadas.
+        rolled = GroupQuantiles(self.relative_accuracy, keys)
+        counts = self.counts
+        if counts is not None and keep is not None:
+            counts = counts[np.asarray(keep)]
+        if counts is not None and len(counts):
+            rolled.counts = counts.groupby(level=list(keys) + ['value']).sum()
+        return rolled
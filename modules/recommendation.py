@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from modules.profiling import profiled
+
+SUGGESTION_COLUMNS = ['id', 'zipcode', 'road', 'house_number', 'price', 'yr_built', 'waterfront', 'renovated', 'bedrooms', 'bathrooms',
+                      'season', 'condition', 'lat', 'long']
+
+def region_median_price(data):
+
+    #mediana do preço da região (zipcode) de cada imóvel, alinhada às linhas de data.
+    return data.groupby('zipcode')['price'].transform('median')
+
+def best_season_to_sell(purchase_table):
+
+    #mediana do preço por região e estação; a estação de maior mediana é a melhor para venda.
+    p_z_c_s = purchase_table[['zipcode', 'season', 'price']].groupby(['zipcode', 'season'], observed=True).median().reset_index()
+    return best_season_from_medians(p_z_c_s)
+
+def best_season_from_medians(p_z_c_s):
+
+    p_z_c_s = p_z_c_s.sort_values(['zipcode', 'price'])
+    p_z_c_s = p_z_c_s.drop_duplicates(subset='zipcode', keep='last')
+    p_z_c_s = p_z_c_s.rename(columns={'season': 'best_season_to_sell', 'price': 'best_price_per_season'})
+    return p_z_c_s.set_index('zipcode')
+
+def suggested_price(price, best_price_per_season):
+
+    price = np.asarray(price, dtype='float64')
+    return np.where(price < best_price_per_season, price + (price * 0.30), price + price * 0.10)
+
+@profiled('results.purchase_suggestions')
+def purchase_suggestions(data, region_median=None, best_seasons=None):
+
+    #sugerindo imóveis em boas condições (4 ou 5) com preço abaixo da mediana da região.
+    if region_median is None:
+        region_median = region_median_price(data)
+    suggested = (data['condition'].to_numpy() >= 4) & (data['price'].to_numpy() < np.asarray(region_median))
+
+    rows = np.flatnonzero(suggested)
+
+    #melhor estação e preço de venda por região, calculados apenas sobre os imóveis sugeridos.
+    if best_seasons is None:
+        best_seasons = best_season_to_sell(data[['zipcode', 'season', 'price']].take(rows))
+    best_seasons = best_seasons.reindex(data['zipcode'].values[rows])
+
+    #montando a tabela coluna a coluna a partir das linhas sugeridas, sem cópias intermediárias (rename/drop).
+    columns = {'yr_built': 'construction_year'}
+    purchase_table = pd.DataFrame({columns.get(column, column): data[column].values[rows] for column in SUGGESTION_COLUMNS if column != 'season'})
+    purchase_table['construction_year'] = purchase_table['construction_year'].astype(str)
+    purchase_table['best_season_to_sell'] = best_seasons['best_season_to_sell'].values
+
+    #preço sugerido: +30% abaixo da mediana da melhor estação, +10% acima dela.
+    purchase_table['suggested_price'] = suggested_price(purchase_table['price'], best_seasons['best_price_per_season'].to_numpy())
+    purchase_table['profit'] = purchase_table['suggested_price'] - purchase_table['price']
+
+    return purchase_table
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+import contextlib
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CACHE_PATH = os.path.join('data', 'cache', 'results.sqlite')
+
+#entra em todas as chaves: deve ser incrementada quando o código que calcula os resultados ou o formato deles mudar.
+RESULT_VERSION = 1
+
+#limite do espaço ocupado pelos resultados; ao passar dele, os menos usados recentemente são descartados.
+MAX_BYTES = int(os.environ.get('HOUSE_ROCKET_RESULT_CACHE_BYTES', 512 * 1024 ** 2))
+
+MISSING = object()
+
+def result_key(parts):
+
+    #chave estável entre processos: as partes (versão dos dados, parâmetros...) viram JSON e depois um hash. A versão
+    #dos resultados e a do pandas (os valores são DataFrames em pickle) também entram, para que um deploy novo
+    #não leia resultados gravados por outro código.
+    content = [RESULT_VERSION, pd.__version__] + list(parts)
+    return hashlib.sha256(json.dumps(content, default=str).encode()).hexdigest()
+
+class ResultCache:
+
+    #resultados calculados (hipóteses e índices da tabela de sugestão) em um SQLite compartilhado por todas as sessões
+    #e processos do dashboard, com descarte LRU por tamanho e contadores de acertos e faltas.
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        #WAL deixa leitores de outros processos trabalhando enquanto um resultado é gravado.
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)')
+
+    def count(self, name):
+
+        self.connection.execute('INSERT INTO counters VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,))
+
+    def get(self, key, count=True):
+
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                if count:
+                    self.count('misses')
+                return MISSING
+            self.connection.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+            if count:
+                self.count('hits')
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (key, blob, len(blob), time.time()))
+            self.evict()
+
+    def evict(self):
+
+        #descartando os resultados acessados há mais tempo até o total caber no limite.
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self.connection.execute('SELECT key, size FROM results ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self.connection.executemany('DELETE FROM results WHERE key = ?', evicted)
+        self.connection.execute('INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                                ('evictions', len(evicted)))
+
+    @contextlib.contextmanager
+    def computing(self, key):
+
+        #trava por chave entre processos: quem chega enquanto outro processo calcula o mesmo resultado espera e lê do cache.
+        if fcntl is None:
+            yield
+            return
+        lock_path = '{0}.{1}.lock'.format(self.path, key[:16])
+        while True:
+            lock_file = open(lock_path, 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            #quem tinha a trava apaga o arquivo ao terminar; se isso aconteceu enquanto esperávamos, a trava é tomada de novo
+            #no arquivo novo.
+            try:
+                if os.path.samestat(os.fstat(lock_file.fileno()), os.stat(lock_path)):
+                    break
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def cached(self, parts, compute):
+
+        key = result_key(parts)
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        with self.computing(key):
+            #outro processo pode ter gravado o resultado enquanto esperávamos a trava.
+            value = self.get(key, count=False)
+            if value is MISSING:
+                value = compute()
+                self.put(key, value)
+        return value
+
+    def stats(self):
+
+        with self.lock:
+            counters = dict(self.connection.execute('SELECT name, value FROM counters'))
+            entries, size = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes, 'hits': hits, 'misses': misses,
+                'evictions': counters.get('evictions', 0), 'hit_rate': hits / (hits + misses) if hits + misses else None}
+
+    def clear(self):
+
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM results')
+            self.connection.execute('DELETE FROM counters')
+
+    def close(self):
+
+        self.connection.close()
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+from modules.dataset import SEASONS, HOUSE_DTYPES, ADDRESS_DTYPES, fill_empty_cells, data_manipulation
+from modules.quantiles import GroupQuantiles
+from modules.recommendation import SUGGESTION_COLUMNS, best_season_from_medians, purchase_suggestions
+
+CHUNKSIZE = 1000000
+
+class AddressLookup:
+
+    #endereços indexados por id (ordenados para busca binária); vale o primeiro endereço de cada id, como no merge seguido de drop_duplicates.
+
+    def __init__(self, path, chunksize=CHUNKSIZE):
+
+        ids, roads, house_numbers = [], [], []
+        for chunk in pd.read_csv(path, usecols=list(ADDRESS_DTYPES), dtype=ADDRESS_DTYPES, chunksize=chunksize):
+            ids.append(chunk['id'].to_numpy())
+            roads.append(chunk['road'].values)
+            house_numbers.append(chunk['house_number'].values)
+
+        ids = np.concatenate(ids)
+        self.road = union_categoricals(roads)
+        self.house_number = union_categoricals(house_numbers)
+
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        first = np.ones(len(sorted_ids), dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+        self.ids = sorted_ids[first]
+        self.rows = order[first]
+
+    def join(self, chunk):
+
+        ids = chunk['id'].to_numpy()
+        positions = np.searchsorted(self.ids, ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == ids[found]
+        rows = self.rows[positions[found]]
+
+        chunk = chunk[found].copy()
+        chunk['road'] = pd.Categorical.from_codes(self.road.codes[rows], dtype=self.road.dtype)
+        chunk['house_number'] = pd.Categorical.from_codes(self.house_number.codes[rows], dtype=self.house_number.dtype)
+        return chunk
+
+class SeenIds:
+
+    #ids já vistos em blocos anteriores, guardados como arrays ordenados (um por bloco).
+
+    def __init__(self):
+
+        self.blocks = []
+
+    def contains(self, ids):
+
+        seen = np.zeros(len(ids), dtype=bool)
+        for block in self.blocks:
+            positions = np.searchsorted(block, ids).clip(max=len(block) - 1)
+            seen |= block[positions] == ids
+        return seen
+
+    def add(self, ids):
+
+        if len(ids):
+            self.blocks.append(np.sort(ids))
+
+    def drop_seen(self, chunk):
+
+        chunk = chunk.drop_duplicates(subset=['id'], keep='first')
+        chunk = chunk[~self.contains(chunk['id'].to_numpy())]
+        self.add(chunk['id'].to_numpy())
+        return chunk
+
+def clean_chunks(path1, path2, chunksize=CHUNKSIZE):
+
+    addresses = AddressLookup(path2, chunksize)
+    seen = SeenIds()
+
+    for chunk in pd.read_csv(path1, dtype=HOUSE_DTYPES, chunksize=chunksize):
+        chunk = seen.drop_seen(addresses.join(fill_empty_cells(chunk)))
+        if len(chunk):
+            yield data_manipulation(chunk).reset_index(drop=True)
+
+def write_chunks(chunks, path):
+
+    #gravando blocos à medida que chegam: Parquet pela extensão .parquet, CSV nos demais casos.
+    writer = None
+    first = True
+    try:
+        for chunk in chunks:
+            if path.endswith('.parquet'):
+                table = pa.Table.from_pandas(chunk, preserve_index=False, schema=writer.schema if writer else None)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+            first = False
+    finally:
+        if writer is not None:
+            writer.close()
+
+def read_chunks(path, columns, chunksize=CHUNKSIZE):
+
+    #sem nenhum bloco gravado o arquivo temporário fica vazio.
+    if os.path.getsize(path) == 0:
+        return
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+        yield batch.to_pandas()
+
+def stream_suggestions(path1, path2, output, chunksize=CHUNKSIZE, relative_accuracy=None, spill_dir=None):
+
+    #1ª passada: limpa os blocos, grava-os em um Parquet temporário e acumula as medianas por zipcode.
+    fd, spill_path = tempfile.mkstemp(suffix='.parquet', dir=spill_dir)
+    os.close(fd)
+
+    zipcode_prices = GroupQuantiles(relative_accuracy, keys=['zipcode'])
+    season_prices = GroupQuantiles(relative_accuracy, keys=['zipcode', 'season'])
+
+    def cleaned():
+        for chunk in clean_chunks(path1, path2, chunksize):
+            zipcode_prices.update({'zipcode': chunk['zipcode'].to_numpy()}, chunk['price'])
+            yield chunk[SUGGESTION_COLUMNS]
+
+    try:
+        write_chunks(cleaned(), spill_path)
+        region_median = zipcode_prices.medians()
+
+        #2ª passada: medianas por zipcode e estação apenas dos imóveis sugeridos.
+        for chunk in read_chunks(spill_path, ['zipcode', 'season', 'price', 'condition'], chunksize):
+            suggested = (chunk['condition'].to_numpy() >= 4) & (chunk['price'].to_numpy() < region_median.reindex(chunk['zipcode']).to_numpy())
+            chunk = chunk[suggested]
+            season_prices.update({'zipcode': chunk['zipcode'].to_numpy(), 'season': chunk['season'].cat.codes.to_numpy()}, chunk['price'])
+
+        p_z_c_s = season_prices.medians().rename('price').reset_index()
+        p_z_c_s['season'] = pd.Categorical.from_codes(p_z_c_s['season'], categories=SEASONS)
+        best_seasons = best_season_from_medians(p_z_c_s)
+
+        #3ª passada: pontuando e gravando os imóveis sugeridos bloco a bloco.
+        totals = {'Number of Properties': 0, 'Total Investiment (U$)': 0.0, 'Total Profit (U$)': 0.0}
+
+        def scored():
+            for chunk in read_chunks(spill_path, SUGGESTION_COLUMNS, chunksize):
+                purchase_table = purchase_suggestions(chunk, region_median.reindex(chunk['zipcode']).to_numpy(), best_seasons)
+                totals['Number of Properties'] += len(purchase_table)
+                totals['Total Investiment (U$)'] += purchase_table['price'].sum()
+                totals['Total Profit (U$)'] += purchase_table['profit'].sum()
+                yield purchase_table
+
+        write_chunks(scored(), output)
+    finally:
+        os.remove(spill_path)
+
+    return totals
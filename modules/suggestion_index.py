@@ -0,0 +1,64 @@
+import numpy as np
+from modules.profiling import profiled
+
+class SuggestionIndex:
+
+    #índice sobre a tabela de sugestão: para cada combinação dos filtros de reformados e vista para o mar,
+    #as posições das linhas ordenadas por número de quartos e as somas acumuladas de preço e lucro.
+    #assim, qualquer filtro é um corte de prefixo (busca binária) e os totais saem sem varrer a tabela.
+
+    @profiled('results.suggestion_index')
+    def __init__(self, purchase_table):
+
+        self.table = purchase_table.reset_index(drop=True)
+
+        bedrooms = self.table['bedrooms'].to_numpy()
+        price = self.table['price'].to_numpy(dtype='float64')
+        profit = self.table['profit'].to_numpy(dtype='float64')
+        not_renovated = (self.table['renovated'] == 'no').to_numpy()
+        not_waterfront = (self.table['waterfront'] == 'no').to_numpy()
+
+        order = np.argsort(bedrooms, kind='stable').astype('int32')
+
+        self.entries = {}
+        for remove_renovated in (False, True):
+            for remove_waterfront in (False, True):
+                keep = np.ones(len(self.table), dtype=bool)
+                if remove_renovated:
+                    keep &= not_renovated
+                if remove_waterfront:
+                    keep &= not_waterfront
+
+                positions = order[keep[order]]
+                self.entries[(remove_renovated, remove_waterfront)] = {
+                    'positions': positions,
+                    'bedrooms': bedrooms[positions],
+                    'price_sum': np.concatenate([[0.0], np.cumsum(price[positions])]),
+                    'profit_sum': np.concatenate([[0.0], np.cumsum(profit[positions])]),
+                }
+
+    def _prefix(self, remove_renovated, remove_waterfront, max_bedrooms):
+
+        entry = self.entries[(bool(remove_renovated), bool(remove_waterfront))]
+        if max_bedrooms is None:
+            return entry, len(entry['positions'])
+        return entry, int(np.searchsorted(entry['bedrooms'], max_bedrooms, side='right'))
+
+    def positions(self, remove_renovated=False, remove_waterfront=False, max_bedrooms=None):
+
+        entry, end = self._prefix(remove_renovated, remove_waterfront, max_bedrooms)
+
+        #devolvendo as linhas na ordem original da tabela.
+        return np.sort(entry['positions'][:end])
+
+    @profiled('results.filter')
+    def filter(self, remove_renovated=False, remove_waterfront=False, max_bedrooms=None):
+
+        return self.table.take(self.positions(remove_renovated, remove_waterfront, max_bedrooms))
+
+    def totals(self, remove_renovated=False, remove_waterfront=False, max_bedrooms=None):
+
+        entry, end = self._prefix(remove_renovated, remove_waterfront, max_bedrooms)
+        return {'Number of Properties': end,
+                'Total Investiment (U$)': entry['price_sum'][end],
+                'Total Profit (U$)': entry['profit_sum'][end]}
@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pandas as pd
+
+SOURCE_HOUSES = r"data/kc_house_data.csv"
+SOURCE_ADDRESSES = r"data/address.csv"
+CHUNKSIZE = 1000000
+
+#os ids sintéticos começam acima dos ids do King County para não colidir com eles.
+FIRST_ID = 10000000000
+
+#desvio (em graus) do ruído somado às coordenadas, para que os imóveis não caiam exatamente sobre os originais.
+COORDINATE_NOISE = 0.001
+
+def load_source(path1=SOURCE_HOUSES, path2=SOURCE_ADDRESSES):
+
+    houses = pd.read_csv(path1)
+    addresses = pd.read_csv(path2, usecols=['id', 'road'])
+    houses = houses.merge(addresses.drop_duplicates(subset='id'), on='id', how='left')
+
+    #taxa de revenda (mesmo id vendido mais de uma vez) da base original.
+    resale_rate = houses['id'].duplicated().mean()
+    return houses, resale_rate
+
+def generate_chunk(source, resale_rate, rows, first_id, random):
+
+    #reamostrando linhas inteiras da base original: zipcode, coordenadas, estação, reformas e preços
+    #mantêm a distribuição conjunta; ids, coordenadas e números das casas recebem valores novos.
+    houses = source.iloc[random.integers(0, len(source), rows)].reset_index(drop=True)
+
+    ids = first_id + np.arange(rows, dtype='int64')
+    resales = np.flatnonzero(random.random(rows) < resale_rate)
+    resales = resales[resales > 0]
+    ids[resales] = ids[random.integers(0, resales)]
+    houses['id'] = ids
+
+    houses['lat'] = (houses['lat'] + random.normal(0, COORDINATE_NOISE, rows)).round(4)
+    houses['long'] = (houses['long'] + random.normal(0, COORDINATE_NOISE, rows)).round(3)
+
+    first = ~houses['id'].duplicated()
+    addresses = pd.DataFrame({
+        'id': houses.loc[first, 'id'],
+        'query': houses.loc[first, 'lat'].astype(str) + ',' + houses.loc[first, 'long'].astype(str),
+        'road': houses.loc[first, 'road'],
+        'house_number': random.integers(1, 40000, first.sum()),
+    })
+
+    return houses.drop(columns=['road']), addresses
+
+def write_synthetic(rows, directory, seed=0, chunksize=CHUNKSIZE, source=None):
+
+    #gravando as duas bases sintéticas em blocos, com o mesmo esquema de kc_house_data.csv e address.csv.
+    source, resale_rate = source or load_source()
+    random = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    path1 = os.path.join(directory, 'kc_house_data.csv')
+    path2 = os.path.join(directory, 'address.csv')
+
+    for start in range(0, rows, chunksize):
+        houses, addresses = generate_chunk(source, resale_rate, min(chunksize, rows - start), FIRST_ID + start, random)
+        houses.to_csv(path1, mode='a' if start else 'w', header=not start, index=False)
+        addresses.to_csv(path2, mode='a' if start else 'w', header=not start, index=False)
+
+    return path1, path2
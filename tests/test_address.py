@@ -0,0 +1,104 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from modules import address
+from modules.address import GeocodeCache, NominatimBackend, reverse_geocode
+
+class StubBackend:
+
+    #devolve um endereço derivado da consulta; falhas[query] diz quantas vezes a consulta falha antes de responder.
+    def __init__(self, failures=None):
+
+        self.failures = dict(failures or {})
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, query):
+
+        with self.lock:
+            self.calls[query] += 1
+            if self.failures.get(query, 0) > 0:
+                self.failures[query] -= 1
+                raise OSError('stub failure')
+        return {'road': 'Road ' + query, 'house_number': '1'}
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+
+    monkeypatch.setattr(address.time, 'sleep', lambda seconds: None)
+
+def geocode(queries, backend, cache_path, retries=2):
+
+    return reverse_geocode(queries, backend=backend, cache_path=str(cache_path), workers=2, rate=0, retries=retries)
+
+def test_repeated_queries_are_geocoded_once(tmp_path):
+
+    backend = StubBackend()
+    results = geocode(['1,2', '3,4', '1,2', '1,2'], backend, tmp_path / 'cache.sqlite')
+
+    assert results == {'1,2': {'road': 'Road 1,2', 'house_number': '1'}, '3,4': {'road': 'Road 3,4', 'house_number': '1'}}
+    assert backend.calls == Counter({'1,2': 1, '3,4': 1})
+
+def test_second_run_is_served_from_cache(tmp_path):
+
+    geocode(['1,2', '3,4'], StubBackend(), tmp_path / 'cache.sqlite')
+    backend = StubBackend()
+    results = geocode(['1,2', '3,4'], backend, tmp_path / 'cache.sqlite')
+
+    assert set(results) == {'1,2', '3,4'}
+    assert not backend.calls
+
+def test_transient_failures_are_retried(tmp_path):
+
+    backend = StubBackend(failures={'1,2': 2})
+    results = geocode(['1,2'], backend, tmp_path / 'cache.sqlite', retries=2)
+
+    assert results['1,2']['road'] == 'Road 1,2'
+    assert backend.calls['1,2'] == 3
+
+def test_failed_queries_stay_out_of_the_cache(tmp_path, caplog):
+
+    backend = StubBackend(failures={'1,2': 10})
+    with caplog.at_level('WARNING', logger='modules.address'):
+        results = geocode(['1,2', '3,4'], backend, tmp_path / 'cache.sqlite', retries=1)
+
+    assert set(results) == {'3,4'}
+    assert backend.calls['1,2'] == 2
+    assert [record.getMessage() for record in caplog.records] == ['geocoding failed for 1,2: stub failure']
+
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        assert set(cache.get(['1,2', '3,4'])) == {'3,4'}
+    finally:
+        cache.close()
+
+    #na execução seguinte a consulta que falhou é tentada de novo.
+    backend = StubBackend()
+    assert set(geocode(['1,2', '3,4'], backend, tmp_path / 'cache.sqlite')) == {'1,2', '3,4'}
+    assert backend.calls == Counter({'1,2': 1})
+
+def test_nominatim_backend_against_a_local_server():
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            body = json.dumps({'address': {'road': 'Stub Road', 'house_number': '42'}}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        backend = NominatimBackend('http://127.0.0.1:{0}/'.format(server.server_port))
+        assert backend('47.5,-122.3') == {'road': 'Stub Road', 'house_number': '42'}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,52 @@
+import os
+import pandas as pd
+from modules import batch
+from modules.dataset import read_sources, data_manipulation
+from modules.recommendation import purchase_suggestions
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+HOUSES = os.path.join(DATA, 'kc_house_data.csv')
+ADDRESSES = os.path.join(DATA, 'address.csv')
+
+def write_partition(directory, houses):
+
+    os.makedirs(directory)
+    houses.to_csv(os.path.join(directory, batch.HOUSES_FILE), index=False)
+    pd.read_csv(ADDRESSES, dtype=str).to_csv(os.path.join(directory, batch.ADDRESSES_FILE), index=False)
+
+def single_file(tmp_path, partitions):
+
+    path = str(tmp_path / 'all.csv')
+    pd.concat(partitions, ignore_index=True).to_csv(path, index=False)
+    return purchase_suggestions(data_manipulation(read_sources(path, ADDRESSES)))
+
+def test_overlapping_partitions_match_single_file(tmp_path):
+
+    houses = pd.read_csv(HOUSES, dtype=str)
+    partitions = [houses.iloc[:8000], houses.iloc[7000:15000], houses.iloc[14000:]]
+    for number, partition in enumerate(partitions):
+        write_partition(str(tmp_path / 'p{0}'.format(number)), partition)
+
+    totals = batch.run(batch.find_partitions(str(tmp_path)), str(tmp_path / 'suggested.csv'), workers=2)
+    expected = single_file(tmp_path, partitions)
+
+    assert totals['Number of Properties'] == len(expected) == 3775
+    assert totals['Total Investiment (U$)'] == expected['price'].sum()
+    assert sorted(pd.read_csv(tmp_path / 'suggested.csv')['id']) == sorted(expected['id'])
+
+def test_first_sale_dropped_in_cleaning_hides_later_sales(tmp_path):
+
+    #a primeira venda do id fica sem quartos e é removida na limpeza; a venda seguinte, em outra partição, também não entra.
+    houses = pd.read_csv(HOUSES, dtype=str).iloc[:2000]
+    house = houses['id'].iloc[0]
+    first = houses.copy()
+    first.loc[first['id'] == house, 'bedrooms'] = ''
+    later = houses[houses['id'] == house].assign(date='20150501T000000', price='1000', condition='5')
+    write_partition(str(tmp_path / 'a'), first)
+    write_partition(str(tmp_path / 'b'), later)
+
+    totals = batch.run(batch.find_partitions(str(tmp_path)), str(tmp_path / 'suggested.csv'), workers=2)
+    expected = single_file(tmp_path, [first, later])
+
+    assert int(house) not in set(pd.read_csv(tmp_path / 'suggested.csv')['id'])
+    assert totals['Number of Properties'] == len(expected)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial import cKDTree
+from modules.comparables import ComparablesIndex, neighborhood_median_price, project
+
+def houses(size=300, seed=0):
+
+    #tabela pequena com coordenadas repetidas (mesmo preço, para que o empate não mude a mediana) e um grupo de um
+    #imóvel só (7 quartos).
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'zipcode': rng.choice([98001, 98002], size).astype('int32'),
+        'price': rng.integers(100, 1000, size).astype('float64') * 1000,
+        'bedrooms': rng.integers(1, 4, size).astype('int8'),
+        'condition': rng.integers(3, 5, size).astype('int8'),
+        'lat': rng.uniform(47.2, 47.8, size),
+        'long': rng.uniform(-122.5, -121.8, size),
+    })
+    copies = data.iloc[:40].copy()
+    data = pd.concat([data, copies, copies.iloc[:10]], ignore_index=True)
+    data.loc[len(data)] = {'zipcode': 98001, 'price': 5e6, 'bedrooms': 7, 'condition': 3, 'lat': 47.5, 'long': -122.0}
+    return data
+
+def brute_force(data, k, exclude_self, by=('bedrooms', 'condition')):
+
+    #distância a todos os imóveis do mesmo grupo, ordenada; o próprio imóvel sai antes de pegar os k primeiros.
+    points = project(data['lat'], data['long'])
+    keys = data[list(by)].to_numpy()
+    medians = np.full(len(data), np.nan)
+    for row in range(len(data)):
+        group = np.flatnonzero((keys == keys[row]).all(axis=1))
+        if exclude_self:
+            group = group[group != row]
+        if not len(group):
+            continue
+        distances = np.linalg.norm(points[group] - points[row], axis=1)
+        nearest = group[np.argsort(distances, kind='stable')[:k]]
+        medians[row] = np.median(data['price'].to_numpy()[nearest])
+    return medians
+
+@pytest.mark.parametrize('k', [1, 3, 10])
+@pytest.mark.parametrize('exclude_self', [True, False])
+def test_matches_brute_force(k, exclude_self):
+
+    data = houses()
+    medians = ComparablesIndex(data).neighborhood_median(data, k, exclude_self=exclude_self)
+    np.testing.assert_allclose(medians, brute_force(data, k, exclude_self))
+
+def test_single_member_group():
+
+    #sem outro comparável, o imóvel fica sem mediana (neighbors == exclude_self); sem exclude_self, é o próprio preço.
+    data = houses()
+    index = ComparablesIndex(data)
+    assert np.isnan(index.neighborhood_median(data)[-1])
+    assert index.neighborhood_median(data, exclude_self=False)[-1] == 5e6
+    assert not np.isnan(index.neighborhood_median(data)[:-1]).any()
+
+def test_self_missing_from_tied_neighbors():
+
+    #cinco cópias do mesmo ponto e k = 1: a consulta devolve 2 das 5 cópias, então algum imóvel não vem entre os
+    #próprios vizinhos e o mais distante é descartado no lugar dele.
+    data = pd.DataFrame({'price': [200.0] * 5 + [900.0], 'bedrooms': 3, 'condition': 3,
+                         'lat': [47.5] * 5 + [47.6], 'long': [-122.3] * 5 + [-122.2]})
+    _, found = cKDTree(project(data['lat'], data['long'])).query(project(data['lat'], data['long'])[:5], k=2)
+    assert not (found == np.arange(5)[:, None]).any(axis=1).all()
+
+    np.testing.assert_array_equal(ComparablesIndex(data).neighborhood_median(data, k=1), [200.0] * 6)
+
+def test_zipcode_fallback_for_houses_without_comparables():
+
+    data = houses()
+    medians = neighborhood_median_price(data, k=3)
+    zipcode_median = data.loc[data['zipcode'] == 98001, 'price'].median()
+    assert medians.iloc[-1] == zipcode_median
+    np.testing.assert_allclose(medians.iloc[:-1], brute_force(data, 3, True)[:-1])
+    assert medians.index.equals(data.index)
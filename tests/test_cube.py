@@ -0,0 +1,52 @@
+import os
+import numpy as np
+import pytest
+from modules.dataset import read_sources, data_manipulation
+from modules.cube import PriceCube, suggestion_statistics
+from modules.hypotheses import HypothesisEngine, aggregate_cube
+from modules.recommendation import purchase_suggestions
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+@pytest.fixture(scope='module')
+def data():
+
+    return data_manipulation(read_sources(os.path.join(DATA, 'kc_house_data.csv'), os.path.join(DATA, 'address.csv')))
+
+def by_id(purchase_table):
+
+    return purchase_table.sort_values('id').reset_index(drop=True)
+
+def test_suggestions_from_cube_match_rows(data):
+
+    region_median, best_seasons = suggestion_statistics(PriceCube(data))
+    purchase_table = purchase_suggestions(data, region_median.reindex(data['zipcode']).to_numpy(), best_seasons)
+
+    np.testing.assert_array_equal(region_median.reindex(data['zipcode']).to_numpy(), data.groupby('zipcode')['price'].transform('median').to_numpy())
+    assert by_id(purchase_table).equals(by_id(purchase_suggestions(data)))
+
+def test_sketch_medians_within_accuracy(data):
+
+    region_median, _ = suggestion_statistics(PriceCube(data, relative_accuracy=0.01))
+    expected = data.groupby('zipcode')['price'].median()
+    np.testing.assert_allclose(region_median.reindex(expected.index).to_numpy(), expected.to_numpy(), rtol=0.02)
+
+def test_price_rollup_is_per_group(data):
+
+    #uma entrada por (zipcode, estação, condição, preço), não por linha.
+    cube = PriceCube(data, relative_accuracy=0.01)
+    assert len(cube.prices.counts) < len(data)
+    assert cube.prices.counts.sum() == len(data)
+
+def test_hypotheses_from_cube_match_rows(data):
+
+    expected = HypothesisEngine(data).results()
+    results = HypothesisEngine(aggregates=aggregate_cube(PriceCube(data))).results()
+    for name in expected:
+        assert results[name]['variation'] == pytest.approx(expected[name]['variation']), name
+        assert results[name]['caption'] == expected[name]['caption'], name
+
+def test_empty_cube(data):
+
+    region_median, best_seasons = suggestion_statistics(PriceCube(data.iloc[:0]))
+    assert len(region_median) == 0 and len(best_seasons) == 0
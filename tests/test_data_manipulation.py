@@ -0,0 +1,127 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from modules.dataset import read_sources, data_manipulation
+from modules.recommendation import purchase_suggestions
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+HOUSES = os.path.join(DATA, 'kc_house_data.csv')
+ADDRESSES = os.path.join(DATA, 'address.csv')
+
+#implementação linha a linha anterior à vetorização, mantida como referência.
+def reference_season(line):
+
+    if line.month == 6 or line.month == 7 or line.month == 8:
+        return 'summer'
+    elif line.month == 9 or line.month == 10 or line.month == 11:
+        return 'autumn'
+    elif line.month == 12 or line.month == 1 or line.month == 2:
+        return 'winter'
+    else:
+        return 'spring'
+
+def reference_data_manipulation(data):
+
+    data.drop_duplicates(subset=['id'], inplace=True, keep='first')
+    data['date'] = pd.to_datetime(data['date'])
+    data['yr_renovated'] = data['yr_renovated'].apply(lambda x: pd.to_datetime(1900, format='%Y') if x == 0 else pd.to_datetime(x, format='%Y'))
+    data['renovated'] = data.apply(lambda line: 'no' if line['yr_renovated'] == pd.to_datetime(1900, format='%Y') else 'yes', axis=1)
+    data['yr_built'] = pd.to_datetime(data['yr_built'], format='%Y')
+    data = data.drop(data[data['bedrooms'] == 33].index)
+    data['basement'] = data['sqft_basement'].apply(lambda line: 'without basement' if line == 0 else 'with basement')
+    data['year'] = data['date'].dt.year
+    data['season'] = data['date'].apply(reference_season)
+    data['waterfront'] = data['waterfront'].apply(lambda line: 'yes' if line == 1 else 'no')
+    data['bathrooms'] = data['bathrooms'].apply(lambda line: round(line, 2))
+    return data
+
+def reference_suggestions(data):
+
+    #regras da página Results anterior à extração do motor de recomendação.
+    data_grouped = data[['zipcode', 'price']].groupby('zipcode').median().reset_index()
+    data_grouped = data_grouped.rename(columns={'price': 'region_median_price'})
+    purchase_table = pd.merge(data, data_grouped, on='zipcode', how='inner')
+    purchase_table = purchase_table[(purchase_table['condition'] >= 4) & (purchase_table['price'] < purchase_table['region_median_price'])]
+    p_z_c_s = purchase_table[['zipcode', 'season', 'price']].groupby(['zipcode', 'season']).median().reset_index().sort_values(['zipcode', 'price'])
+    p_z_c_s = p_z_c_s.drop_duplicates(subset='zipcode', keep='last')
+    p_z_c_s = p_z_c_s.rename(columns={'season': 'best_season_to_sell', 'price': 'best_price_per_season'})
+    purchase_table = pd.merge(purchase_table, p_z_c_s, on='zipcode', how='inner')
+    purchase_table['suggested_price'] = purchase_table.apply(lambda line: (line['price'] + (line['price'] * 0.30)) if line['price'] < line[
+        'best_price_per_season'] else (line['price'] + line['price'] * 0.10), axis=1)
+    purchase_table['profit'] = purchase_table['suggested_price'] - purchase_table['price']
+    return purchase_table
+
+@pytest.fixture(scope='module')
+def reference():
+
+    data = pd.merge(pd.read_csv(HOUSES), pd.read_csv(ADDRESSES), on='id', how='inner').drop(columns=['query'])
+    return reference_data_manipulation(data).reset_index(drop=True)
+
+@pytest.fixture(scope='module')
+def data():
+
+    return data_manipulation(read_sources(HOUSES, ADDRESSES)).reset_index(drop=True)
+
+def test_same_rows(reference, data):
+
+    assert len(data) == len(reference) == 21422
+    np.testing.assert_array_equal(data['id'].to_numpy(), reference['id'].to_numpy())
+
+def test_numeric_columns(reference, data):
+
+    for column in ['price', 'bedrooms', 'sqft_living', 'sqft_lot', 'condition', 'grade', 'zipcode', 'year']:
+        np.testing.assert_array_equal(data[column].to_numpy(dtype='float64'), reference[column].to_numpy(dtype='float64'), err_msg=column)
+    for column in ['bathrooms', 'floors', 'lat', 'long']:
+        np.testing.assert_allclose(data[column].to_numpy(dtype='float64'), reference[column].to_numpy(dtype='float64'), rtol=1e-6, err_msg=column)
+
+def test_dates_and_years(reference, data):
+
+    assert (data['date'] == reference['date']).all()
+    np.testing.assert_array_equal(data['yr_built'].to_numpy(), reference['yr_built'].dt.year.to_numpy())
+    np.testing.assert_array_equal(data['yr_renovated'].to_numpy(), reference['yr_renovated'].dt.year.to_numpy())
+
+def test_flag_columns_are_categorical(reference, data):
+
+    expected_categories = {
+        'waterfront': ['no', 'yes'],
+        'renovated': ['no', 'yes'],
+        'basement': ['with basement', 'without basement'],
+        'season': ['autumn', 'spring', 'summer', 'winter'],
+    }
+    for column, categories in expected_categories.items():
+        assert isinstance(data[column].dtype, pd.CategoricalDtype), column
+        assert list(data[column].cat.categories) == categories, column
+        np.testing.assert_array_equal(data[column].astype(str).to_numpy(), reference[column].astype(str).to_numpy(), err_msg=column)
+
+def test_suggestion_totals(reference, data):
+
+    expected = reference_suggestions(reference)
+    purchase_table = purchase_suggestions(data)
+
+    assert len(purchase_table) == len(expected) == 3775
+    assert purchase_table['price'].sum() == expected['price'].sum() == 1483480263
+    assert round(purchase_table['profit'].sum()) == round(expected['profit'].sum()) == 315284211
+
+    purchase_table = purchase_table.sort_values('id').reset_index(drop=True)
+    expected = expected.sort_values('id').reset_index(drop=True)
+    np.testing.assert_allclose(purchase_table['suggested_price'], expected['suggested_price'])
+    np.testing.assert_array_equal(purchase_table['best_season_to_sell'].astype(str), expected['best_season_to_sell'].astype(str))
+
+def test_empty_cells(tmp_path, data):
+
+    houses = pd.read_csv(HOUSES, dtype=str)
+    no_renovation = houses['yr_renovated'] == '0'
+    houses.loc[no_renovation, 'yr_renovated'] = ''
+    houses.loc[houses.index[7], 'sqft_basement'] = ''
+    houses.loc[houses.index[5], 'bedrooms'] = ''
+    houses.to_csv(tmp_path / 'houses.csv', index=False)
+
+    cleaned = data_manipulation(read_sources(str(tmp_path / 'houses.csv'), ADDRESSES)).reset_index(drop=True)
+
+    #ano de reforma e porão vazios contam como zero; o imóvel sem número de quartos fica de fora.
+    assert list(cleaned['id']) == [house for house in data['id'] if house != int(houses['id'].iloc[5])]
+    assert (cleaned.dtypes == data.dtypes).all()
+    expected = data[data['id'] != int(houses['id'].iloc[5])].reset_index(drop=True)
+    assert (cleaned['renovated'] == expected['renovated']).all()
+    assert cleaned.loc[cleaned['id'] == int(houses['id'].iloc[7]), 'basement'].item() == 'without basement'
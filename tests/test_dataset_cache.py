@@ -0,0 +1,48 @@
+import os
+import shutil
+import pyarrow as pa
+import pandas as pd
+import pytest
+from modules.dataset import load_data, read_sources, data_manipulation
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+HOUSES = os.path.join(DATA, 'kc_house_data.csv')
+ADDRESSES = os.path.join(DATA, 'address.csv')
+
+@pytest.fixture()
+def sources(tmp_path):
+
+    shutil.copy(HOUSES, tmp_path / 'kc_house_data.csv')
+    shutil.copy(ADDRESSES, tmp_path / 'address.csv')
+    return str(tmp_path / 'kc_house_data.csv'), str(tmp_path / 'address.csv'), str(tmp_path / 'cache')
+
+def test_cached_frame_matches_a_fresh_build(sources):
+
+    path1, path2, cache_dir = sources
+    expected = data_manipulation(read_sources(path1, path2)).reset_index(drop=True)
+
+    cold = load_data(path1, path2, cache_dir)
+    warm = load_data(path1, path2, cache_dir)
+    pd.testing.assert_frame_equal(cold, expected)
+    pd.testing.assert_frame_equal(warm, expected)
+
+def test_warm_read_maps_columns_without_copying(sources):
+
+    path1, path2, cache_dir = sources
+    load_data(path1, path2, cache_dir)
+
+    before = pa.total_allocated_bytes()
+    data = load_data(path1, path2, cache_dir)
+    #só os dicionários das categorias são alocados; as colunas são vistas (somente leitura) do arquivo mapeado.
+    assert pa.total_allocated_bytes() - before < data.select_dtypes(exclude='category').memory_usage(index=False).sum() / 4
+    for column in ['id', 'price', 'lat', 'zipcode', 'date']:
+        assert not data[column].to_numpy().flags.writeable, column
+
+def test_changed_source_invalidates_the_cache(sources):
+
+    path1, path2, cache_dir = sources
+    load_data(path1, path2, cache_dir)
+
+    houses = pd.read_csv(path1)
+    houses.iloc[:100].to_csv(path1, index=False)
+    assert len(load_data(path1, path2, cache_dir)) <= 100
@@ -0,0 +1,80 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from modules.dataset import yes_no
+from modules.export import export_table, export_bytes, cached_export, totals_json, totals_csv
+
+def suggestions(size):
+
+    #tabela no formato da sugestão, com colunas categóricas como as do dashboard.
+    return pd.DataFrame({
+        'id': np.arange(size, dtype='int64'),
+        'road': pd.Categorical(['Main Street', 'Second Avenue'] * (size // 2) + ['Main Street'] * (size % 2)),
+        'waterfront': yes_no(np.arange(size) % 2),
+        'price': 100000.0 + 1000 * np.arange(size),
+        'lat': np.linspace(47.1, 47.9, size).astype('float32'),
+        'long': np.linspace(-122.9, -122.1, size).astype('float32'),
+    })
+
+@pytest.mark.parametrize('chunksize', [3, 1000])
+def test_geojson_points_are_long_lat(chunksize):
+
+    purchase_table = suggestions(10)
+    collection = json.loads(export_bytes(purchase_table, 'geojson', chunksize=chunksize))
+
+    assert collection['type'] == 'FeatureCollection'
+    assert len(collection['features']) == 10
+    for feature, row in zip(collection['features'], purchase_table.itertuples()):
+        assert feature['geometry']['type'] == 'Point'
+        assert feature['geometry']['coordinates'] == pytest.approx([row.long, row.lat])
+        assert feature['properties'] == {'id': row.id, 'road': row.road, 'waterfront': row.waterfront, 'price': row.price}
+
+def test_empty_table_gives_valid_files(tmp_path):
+
+    purchase_table = suggestions(0)
+
+    assert json.loads(export_bytes(purchase_table, 'geojson')) == {'type': 'FeatureCollection', 'features': []}
+
+    export_table(purchase_table, str(tmp_path / 'empty.parquet'))
+    table = pq.read_table(str(tmp_path / 'empty.parquet'))
+    assert table.num_rows == 0 and table.column_names == list(purchase_table.columns)
+
+    assert export_bytes(purchase_table, 'csv').decode().splitlines() == ['"id","road","waterfront","price","lat","long"']
+
+def test_categories_are_written_as_strings(tmp_path):
+
+    purchase_table = suggestions(5)
+    export_table(purchase_table, str(tmp_path / 'suggested.parquet'), chunksize=2)
+    table = pq.read_table(str(tmp_path / 'suggested.parquet'))
+
+    assert str(table.schema.field('road').type) == 'string'
+    assert table.column('waterfront').to_pylist() == list(purchase_table['waterfront'].astype(str))
+
+    csv = pd.read_csv(io.BytesIO(export_bytes(purchase_table, 'csv', chunksize=2)))
+    assert list(csv['road']) == list(purchase_table['road'].astype(str))
+
+def test_cached_export_writes_once_and_keeps_recent_files(tmp_path):
+
+    calls = []
+    def build():
+        calls.append(1)
+        return suggestions(4)
+
+    path = cached_export('a', build, 'csv', directory=str(tmp_path), max_files=2)
+    assert cached_export('a', build, 'csv', directory=str(tmp_path), max_files=2) == path
+    assert calls == [1]
+
+    for key in ['b', 'c']:
+        os.utime(path, (0, 0))
+        cached_export(key, build, 'parquet', directory=str(tmp_path), max_files=2)
+    assert sorted(os.listdir(tmp_path)) == ['b.parquet', 'c.parquet']
+
+def test_totals():
+
+    totals = {'Number of Properties': np.int64(2), 'Total Investiment (U$)': np.float64(10.5), 'Total Profit (U$)': np.float64(1.5)}
+    assert json.loads(totals_json(totals)) == {'Number of Properties': 2, 'Total Investiment (U$)': 10.5, 'Total Profit (U$)': 1.5}
+    assert totals_csv(totals).splitlines()[1] == '2,10.5,1.5'
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from modules.dataset import read_sources, data_manipulation
+from modules.hypotheses import HypothesisEngine
+from modules.ingestion import SalesStore, store_version
+from modules.recommendation import purchase_suggestions
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+HOUSES = os.path.join(DATA, 'kc_house_data.csv')
+ADDRESSES = os.path.join(DATA, 'address.csv')
+
+@pytest.fixture(scope='module')
+def sales():
+
+    return read_sources(HOUSES, ADDRESSES)
+
+def split(sales):
+
+    #base até março de 2015; o lote traz as vendas seguintes e 200 vendas antigas com preço novo.
+    early = (sales['date'] < '20150401').to_numpy()
+    repriced = sales[early].iloc[:200].assign(price=lambda frame: frame['price'] * 2)
+    return sales[early], pd.concat([sales[~early], repriced], ignore_index=True)
+
+def by_id(purchase_table):
+
+    return purchase_table.sort_values('id').reset_index(drop=True)
+
+def test_append_matches_full_rebuild(sales):
+
+    base, delta = split(sales)
+    store = SalesStore(data_manipulation(base.copy()), base['id'])
+    _, ignored = store.append(delta)
+    #os 200 preços novos e as revendas de imóveis já vendidos antes de abril de 2015.
+    assert ignored == (delta['id'].isin(base['id']) | delta['id'].duplicated()).sum() >= 200
+
+    #a base inteira lida de uma vez: a primeira venda de cada id vale, então os preços novos são ignorados.
+    full = data_manipulation(pd.concat([base, delta], ignore_index=True))
+    expected = purchase_suggestions(full)
+
+    actual = store.purchase_table
+    assert len(actual) == len(expected) == 3775
+    assert actual['price'].sum() == expected['price'].sum() == 1483480263
+    pd.testing.assert_series_equal(by_id(actual)['suggested_price'], by_id(expected)['suggested_price'])
+    np.testing.assert_array_equal(by_id(actual)['best_season_to_sell'].astype(str), by_id(expected)['best_season_to_sell'].astype(str))
+    assert sorted(store.data['id']) == sorted(full['id'])
+
+    variations = {name: result.get('variation') for name, result in HypothesisEngine(full).results().items()}
+    assert {name: result.get('variation') for name, result in store.hypotheses.results().items()} == pytest.approx(variations)
+
+def test_append_only_touches_affected_zipcodes(sales):
+
+    base, delta = split(sales)
+    store = SalesStore(data_manipulation(base.copy()), base['id'])
+    partitions, suggestions = dict(store.partitions), dict(store.suggestions)
+
+    delta = delta[delta['zipcode'] == 98001]
+    affected, ignored = store.append(delta)
+    assert list(affected) == [98001]
+    assert ignored == (delta['id'].isin(base['id']) | delta['id'].duplicated()).sum()
+
+    assert all(store.partitions[zipcode] is partition for zipcode, partition in partitions.items() if zipcode != 98001)
+    assert all(store.suggestions[zipcode] is table for zipcode, table in suggestions.items() if zipcode != 98001)
+    assert isinstance(store.data['road'].dtype, pd.CategoricalDtype)
+
+def test_version_changes_only_with_new_sales(tmp_path, sales):
+
+    base, delta = split(sales)
+    store = SalesStore(data_manipulation(base.copy()), base['id'], version='base')
+    store.append(base.iloc[:10])
+    assert store.version == 'base'
+
+    store.append(delta)
+    store.save(str(tmp_path / 'store.pickle'))
+    assert store_version(str(tmp_path / 'store.pickle')) == store.version != 'base'
+    assert SalesStore.load(str(tmp_path / 'store.pickle')).version == store.version
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from modules.quantiles import GroupQuantiles
+
+def test_exact_medians_match_pandas():
+
+    random = np.random.default_rng(0)
+    groups = random.integers(0, 5, 1000)
+    values = random.integers(1, 100, 1000).astype('float64')
+
+    quantiles = GroupQuantiles(keys=['group'])
+    quantiles.update({'group': groups[:400]}, values[:400])
+    quantiles.update({'group': groups[400:]}, values[400:])
+
+    expected = pd.Series(values).groupby(groups).median()
+    np.testing.assert_allclose(quantiles.medians().sort_index().to_numpy(), expected.to_numpy())
+
+def test_sketch_medians_are_within_relative_accuracy():
+
+    random = np.random.default_rng(1)
+    values = random.lognormal(13, 0.5, 5000)
+    quantiles = GroupQuantiles(relative_accuracy=0.01, keys=['group'])
+    quantiles.update({'group': np.zeros(len(values), dtype='int64')}, values)
+    assert abs(quantiles.medians()[0] / np.median(values) - 1) <= 0.02
+
+def test_no_values_gives_empty_medians():
+
+    quantiles = GroupQuantiles(keys=['zipcode', 'season'])
+    quantiles.update({'zipcode': np.array([], dtype='int64'), 'season': np.array([], dtype='int64')}, np.array([]))
+    medians = quantiles.medians()
+    assert len(medians) == 0
+    assert list(medians.index.names) == ['zipcode', 'season']
+    assert len(GroupQuantiles(keys=['zipcode']).medians().reset_index().columns) == 2
+
+def test_sketch_accepts_zero_prices():
+
+    quantiles = GroupQuantiles(relative_accuracy=0.01, keys=['group'])
+    quantiles.update({'group': np.zeros(3, dtype='int64')}, np.array([0.0, 0.0, 100.0]))
+    assert quantiles.medians()[0] == 0.0
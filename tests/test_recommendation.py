@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from modules.dataset import yes_no, SEASONS
+from modules.recommendation import purchase_suggestions, region_median_price, suggested_price
+
+def houses(rows):
+
+    #tabela mínima com as colunas que purchase_suggestions usa; rows: (id, zipcode, price, condition, season).
+    ids, zipcodes, prices, conditions, seasons = zip(*rows)
+    size = len(rows)
+    return pd.DataFrame({
+        'id': np.array(ids, dtype='int64'),
+        'zipcode': np.array(zipcodes, dtype='int32'),
+        'road': pd.Categorical(['Main Street'] * size),
+        'house_number': pd.Categorical(['1'] * size),
+        'price': np.array(prices, dtype='float64'),
+        'yr_built': np.full(size, 1990, dtype='int16'),
+        'waterfront': yes_no(np.zeros(size, dtype=bool)),
+        'renovated': yes_no(np.zeros(size, dtype=bool)),
+        'bedrooms': np.full(size, 3, dtype='int8'),
+        'bathrooms': np.full(size, 2, dtype='float32'),
+        'season': pd.Categorical(seasons, categories=SEASONS),
+        'condition': np.array(conditions, dtype='int8'),
+        'lat': np.full(size, 47.5, dtype='float32'),
+        'long': np.full(size, -122.3, dtype='float32'),
+    })
+
+def test_region_median_is_per_zipcode():
+
+    data = houses([(1, 1, 100, 3, 'winter'), (2, 1, 300, 3, 'winter'), (3, 2, 1000, 3, 'winter')])
+    np.testing.assert_array_equal(region_median_price(data), [200, 200, 1000])
+
+def test_only_good_condition_below_region_median():
+
+    data = houses([
+        (1, 1, 100, 4, 'winter'),   #sugerido
+        (2, 1, 150, 3, 'winter'),   #condição abaixo de 4
+        (3, 1, 400, 5, 'winter'),   #acima da mediana (250)
+        (4, 1, 250, 4, 'winter'),   #igual à mediana não é sugerido
+        (5, 1, 500, 2, 'winter'),
+        (6, 1, 120, 5, 'summer'),   #sugerido
+    ])
+    purchase_table = purchase_suggestions(data)
+    assert sorted(purchase_table['id']) == [1, 6]
+
+def test_suggested_price_rule():
+
+    np.testing.assert_allclose(suggested_price([100, 200, 300], 200), [130, 220, 330])
+
+def test_best_season_and_profit():
+
+    #zipcode 1: mediana 400; sugeridos 100 (winter), 200 e 300 (summer) → melhor estação summer, mediana 250.
+    data = houses([
+        (1, 1, 100, 4, 'winter'),
+        (2, 1, 200, 4, 'summer'),
+        (3, 1, 300, 4, 'summer'),
+        (4, 1, 500, 4, 'spring'),
+        (5, 1, 600, 4, 'spring'),
+        (6, 1, 700, 4, 'spring'),
+    ])
+    purchase_table = purchase_suggestions(data).set_index('id')
+
+    assert list(purchase_table.index) == [1, 2, 3]
+    assert (purchase_table['best_season_to_sell'] == 'summer').all()
+    #+30% abaixo da mediana da melhor estação, +10% acima dela.
+    np.testing.assert_allclose(purchase_table['suggested_price'], [130, 260, 330])
+    np.testing.assert_allclose(purchase_table['profit'], [30, 60, 30])
+    assert list(purchase_table['construction_year']) == ['1990'] * 3
+
+def test_precomputed_medians_are_used():
+
+    data = houses([(1, 1, 100, 4, 'winter'), (2, 1, 300, 4, 'winter')])
+    purchase_table = purchase_suggestions(data, region_median=np.array([1000, 1000]))
+    assert sorted(purchase_table['id']) == [1, 2]
@@ -0,0 +1,22 @@
+import os
+from modules import result_cache
+from modules.result_cache import ResultCache, result_key
+
+def test_key_depends_on_result_version(monkeypatch):
+
+    key = result_key(['suggestions', 'abc', 'zipcode'])
+    monkeypatch.setattr(result_cache, 'RESULT_VERSION', result_cache.RESULT_VERSION + 1)
+    assert result_key(['suggestions', 'abc', 'zipcode']) != key
+
+def test_cached_computes_once_and_removes_the_lock(tmp_path):
+
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    calls = []
+    try:
+        assert cache.cached(['hypotheses', 'abc'], lambda: calls.append(1) or {'H1': 1}) == {'H1': 1}
+        assert cache.cached(['hypotheses', 'abc'], lambda: calls.append(1) or {'H1': 2}) == {'H1': 1}
+        assert calls == [1]
+        assert cache.stats()['hits'] == 1
+    finally:
+        cache.close()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.lock')]
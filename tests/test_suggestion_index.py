@@ -0,0 +1,48 @@
+import os
+import itertools
+import pytest
+from modules.dataset import read_sources, data_manipulation
+from modules.recommendation import purchase_suggestions
+from modules.suggestion_index import SuggestionIndex
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+@pytest.fixture(scope='module')
+def purchase_table():
+
+    #a tabela como a página Results recebe, com id e zipcode em texto.
+    purchase_table = purchase_suggestions(data_manipulation(read_sources(os.path.join(DATA, 'kc_house_data.csv'), os.path.join(DATA, 'address.csv'))))
+    purchase_table['id'] = purchase_table['id'].astype(str)
+    purchase_table['zipcode'] = purchase_table['zipcode'].astype(str)
+    return purchase_table
+
+def masked(purchase_table, insight1, insight2, insight3):
+
+    #os quatro filtros da página Results antes do índice.
+    if insight1 == False and insight2 == False:
+        return purchase_table[purchase_table['bedrooms'] <= insight3]
+    elif insight1 == True and insight2 == False:
+        return purchase_table[(purchase_table['bedrooms'] <= insight3) & (purchase_table['renovated'] == 'no')]
+    elif insight1 == False and insight2 == True:
+        return purchase_table[(purchase_table['bedrooms'] <= insight3) & (purchase_table['waterfront'] == 'no')]
+    elif insight1 == True and insight2 == True:
+        return purchase_table[(purchase_table['bedrooms'] <= insight3) & (purchase_table['waterfront'] == 'no') & (purchase_table['renovated'] == 'no')]
+
+@pytest.mark.parametrize('insight1, insight2', list(itertools.product([False, True], repeat=2)))
+def test_index_matches_mask_branches(purchase_table, insight1, insight2):
+
+    suggestions = SuggestionIndex(purchase_table)
+    for insight3 in range(1, 12):
+        expected = masked(purchase_table, insight1, insight2, insight3)
+        assert suggestions.filter(insight1, insight2, insight3).reset_index(drop=True).equals(expected.reset_index(drop=True))
+
+        totals = suggestions.totals(insight1, insight2, insight3)
+        assert totals['Number of Properties'] == len(expected.index)
+        assert totals['Total Investiment (U$)'] == pytest.approx(expected['price'].sum(), rel=1e-12)
+        assert totals['Total Profit (U$)'] == pytest.approx(expected['profit'].sum(), rel=1e-12)
+
+def test_slider_covers_every_bedroom_count(purchase_table):
+
+    #o slider vai até 11 quartos; a tabela não pode ter imóveis que nenhum filtro alcança.
+    assert purchase_table['bedrooms'].max() <= 11
+    assert len(SuggestionIndex(purchase_table).filter(max_bedrooms=11)) == len(purchase_table)